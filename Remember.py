@@ -1,48 +1,53 @@
 import ui
-import shelve
+from collections import OrderedDict
 from datetime import date, datetime, timedelta
-from objc_util import *
-from console import alert
+from RememberCore import ReminderModel, HeaderCache, SQLiteStorage, Profiler, WriteBehind
+from RememberWidget import SnapshotFile, SNAPSHOT_PATH
+from RememberLayout import layout_frames, DATE_BUTTON_WIDTH
 
 DISPLAY_WEEKDAY = True
+USE_SQLITE = False  # Keep events in Remember.sqlite instead of the journal files, existing events are copied over the first time
 KEYBOARD_HEIGHT = 0  # Will later be set to correct value by method call when keyboard is displayed
-LIST_INSET = 50
-NAME_INPUT_HEIGHT = 35
-DATE_PICKER_HEIGHT = NAME_INPUT_HEIGHT * 4
-REPEAT_BAR_HEIGHT = NAME_INPUT_HEIGHT
-CHOOSE_COLOUR_BAR_HEIGHT = REPEAT_BAR_HEIGHT
-DATE_BUTTON_WIDTH = 30
-DATE_BUTTON_SPACE = 10
-REPEAT_BUTTON_SPACE = 5
-TOP_BAR_HEIGHT = 45
-STATUS_BAR_HEIGHT = 52  # Space allowed for the status bar
-EDIT_BUTTON_WIDTH = 47
-EDIT_BUTTON_HEIGHT = 23
-EDIT_BUTTON_SPACE = 2
+SUGGESTION_COUNT = 3  # Earlier names offered while a reminder name is typed
+BUTTON_STYLE = {'background_color': (1, 0, 0, 1), 'tint_color': 'white', 'font': ('HelveticaNeue-Light', 18), 'corner_radius': 3, 'border_width': 1.5}
+ROUND_BUTTON_STYLE = dict(BUTTON_STYLE, corner_radius=DATE_BUTTON_WIDTH / 2)
+WEEKDAY_LETTERS = ['M', 'T', 'W', 'T', 'F', 'S', 'S']
+DATE_BADGE_WIDTH = 1.5  # Outline of the sidebar dates that have an event showing
+WINDOW_DAYS_BEFORE = 31  # Days before today shown when the list opens
+WINDOW_DAYS_AFTER = 365  # Days after today shown when the list opens
+WINDOW_PAGE_DAYS = 180  # Days added to the list each time it is scrolled to either end
+WINDOW_PAGE_MARGIN = 100  # Distance in points from either end of the list at which the next page is loaded
+PROFILE = False  # Time the app's callbacks, the model and storage, see PROFILE_COMMAND
+PROFILE_COMMAND = '?profile'  # Entered as a reminder name while profiling, shows the timings instead of adding it
+PROFILE_PATH = 'Remember.profile.json'  # Timings and gauges are written here when the app closes while profiling
+PROFILER = None
+CELL_CACHE_SIZE = 200  # Table cells kept for reuse
+WIDGET_DAYS = 7  # Days written to the snapshot RememberWidget.py shows
+ARCHIVE_DAYS = 90  # Dates further back than this are moved to Remember.archive when the app opens, None to keep them all
 
 def get_text_colour(colour):
 	luminance = 0.2126 * colour[0] + 0.7152 * colour[1] + 0.0722 * colour[2]
 	return 'black' if luminance > 0.2 else 'lightgrey'
 
 
-class Reminder (object):
-	def __init__(self, name, colour, repeat=[], start_date=None, end_date=None):
-		self.name = name
-		self.colour = colour  # tuple of rgb values in range 0-1
-		self.repeat = repeat  # list of weekdays this event repeats
-		self.start_date = start_date  # for repeating events
-		self.end_date = end_date  # for repeating events
-	
-	def equal_to(self, other):
-		return self.name == other.name and self.colour == other.colour and self.repeat == other.repeat and self.start_date == other.start_date and self.end_date == other.end_date
-
-
 class ReminderHandler (object):
+	# Table data source and delegate, a thin adapter over ReminderModel
 	def __init__(self, parent):
-		self.load()
+		self.model = ReminderModel('Remember', SQLiteStorage('Remember.sqlite') if USE_SQLITE else None, write_behind=True)
+		if ARCHIVE_DAYS is not None:
+			self.model.archive_before(parent.today - timedelta(days=ARCHIVE_DAYS))
+		self.model.set_window(parent.today - timedelta(days=WINDOW_DAYS_BEFORE), parent.today + timedelta(days=WINDOW_DAYS_AFTER))
+		self.all_colours = self.model.all_colours
 		self.parent = parent
 		self.editing_date = None
 		self.editing_reminder = None
+		self.paged_back = False  # set once a pull past the top has loaded a page, until the pull ends
+		self.headers = HeaderCache()
+		self.headers.prepare(self.get_enabled_dates(), parent.today, DISPLAY_WEEKDAY)
+		self.cells = OrderedDict()  # (date, row, id, name, colour): cell, least recently used first
+		self.model.take_changes()  # what the table first shows, later changes are compared with it
+		self.widget_snapshot = WriteBehind(SnapshotFile(SNAPSHOT_PATH))  # written once changes pause, not on every tap
+		self.write_widget_snapshot()
 		
 	def tableview_number_of_sections(self, tableview):
 		# Return the number of sections (defaults to 1)
@@ -57,53 +62,24 @@ class ReminderHandler (object):
 		
 	def tableview_cell_for_row(self, tableview, section, row):
 		# Create and return a cell for the given section/row
-		cell = ui.TableViewCell()
-		cell.bg_color = self.all_colours[self.get_reminder(section, row).colour]
-		cell.text_label.text_color = get_text_colour(cell.bg_color)
-		
-		cell.text_label.text = self.get_reminder(section, row).name
+		# A row that is shown again gets the cell it had, as long as it still holds the same reminder
+		reminder = self.get_reminder(section, row)
+		key = (self.get_enabled_dates()[section], row, reminder.id, reminder.name, reminder.colour)
+		cell = self.cells.pop(key, None)
+		if cell is None:
+			cell = ui.TableViewCell()
+			cell.bg_color = self.all_colours[reminder.colour]
+			cell.text_label.text_color = get_text_colour(cell.bg_color)
+			cell.text_label.text = reminder.name
+			if len(self.cells) >= CELL_CACHE_SIZE:
+				self.cells.popitem(last=False)
+		self.cells[key] = cell
 		return cell
 		
 	def tableview_title_for_header(self, tableview, section):
 		# Return a title for the given section.
 		# If this is not implemented, no section headers will be shown.
-
-		d = self.get_enabled_dates()[section]
-		if d == 'Remember':
-			return d
-		
-		day_str = str(d.day)
-		weekday = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday'][d.weekday()]
-		month = ['January', 'February', 'March', 'April', 'May', 'June', 'July',
-				 'August', 'September', 'October', 'November', 'December'][d.month - 1]
-		
-		close = ''
-		if abs((d - self.parent.today).days) < 2:
-			days = d.weekday() - self.parent.today.weekday() % 7
-			if days < 0:
-				days += 7
-			if days == 0:
-				close = 'Today - '
-			elif days == 1:
-				close = 'Tomorrow - '
-			else: 
-				close = 'Yesterday - '  # -1 is the only other option
-			
-		section_name = close + ((weekday + ', ') if DISPLAY_WEEKDAY else '')
-		section_name += month + ' ' + day_str
-		if day_str.endswith('1') and day_str != '11':
-			section_name += 'st'
-		elif day_str.endswith('2') and day_str != '12':
-			section_name += "nd"
-		elif day_str.endswith('3') and day_str != '13':
-			section_name += "rd"
-		else:
-			section_name += "th"
-
-		if d.year != self.parent.today.year:
-			section_name += ', ' + str(d.year)
-		
-		return section_name
+		return self.headers.get(self.get_enabled_dates()[section], self.parent.today, DISPLAY_WEEKDAY)
 		
 	def tableview_can_delete(self, tableview, section, row):
 		# Return True if the user should be able to delete the given row.
@@ -119,6 +95,7 @@ class ReminderHandler (object):
 		reminder = self.get_reminder(section, row)
 		
 		if reminder.repeat:
+			from console import alert
 			try:
 				x = alert('Delete Repeated Event', 'Would you like to delete all occurrences of the event?',
 						  'Delete One', 'Delete All')
@@ -127,11 +104,11 @@ class ReminderHandler (object):
 			if x == 0:
 				return
 			elif x == 1:
-				self.remove_event(reminder, date)
+				self.model.remove_event(reminder, date)
 			elif x == 2:
-				self.remove_repeat_events_in_range(reminder, reminder.start_date, reminder.end_date)
+				self.model.remove_repeat_events_in_range(reminder, reminder.start_date, reminder.end_date)
 		else:
-			self.remove_event(reminder, date)
+			self.model.remove_event(reminder, date)
 		
 		self.update(tableview)
 		
@@ -141,14 +118,17 @@ class ReminderHandler (object):
 			return
 		
 		reminder = self.get_reminder(from_section, from_row)
+		from_date = self.get_enabled_dates()[from_section]
 		date = self.get_enabled_dates()[to_section]
-		self.tableview_delete(tableview, from_section, from_row)
-		
-		if len(self.events[date]) > to_row:
-			self.events[date].insert(to_row, reminder)
-		else:
-			self.events[date].append(reminder)
-		self.update(tableview)
+		self.model.move_event(reminder, from_date, date, to_row)
+		self.model.save()
+		self.parent.update_date_badges()
+		self.write_widget_snapshot()
+		
+		# The table has already moved the row, it only needs reloading if the model placed it differently
+		changes = self.model.take_changes()
+		if tableview and (changes.sections_changed() or changes.deleted_rows or changes.inserted_rows or changes.moved_rows != [((from_section, from_row), (to_section, to_row))]):
+			tableview.reload_data()
 		
 	# Delegate Functions
 	
@@ -183,140 +163,71 @@ class ReminderHandler (object):
 	def tableview_title_for_delete_button(self, tableview, section, row):
 		return 'Delete'
 		
-	def add_event(self, name, colour, repeat, date, end_date):
-		if not repeat:
-			end_date = date
-		
-		reminder = Reminder(name, colour, repeat, date, end_date)
+	def scrollview_did_scroll(self, scrollview):
+		# Page in earlier dates when pulled down past the top, later ones when nearing the bottom
+		self.refresh(scrollview)
+		span = self.model.date_span()
+		if span is None:
+			return
+		start, end = self.model.window
+		y = scrollview.content_offset[1]
+		if y >= 0:
+			self.paged_back = False
+		if y < -WINDOW_PAGE_MARGIN and start > span[0] and not self.paged_back:
+			self.paged_back = True
+			self.model.extend_window(days_before=WINDOW_PAGE_DAYS)
+			self.model.restore_archived(self.model.window[0])
+			self.headers.prepare(self.model.dates.range(self.model.window[0], start), self.parent.today, DISPLAY_WEEKDAY)
+			self.model.take_changes()
+			scrollview.reload_data()
+		elif y + scrollview.height > scrollview.content_size[1] - WINDOW_PAGE_MARGIN and end < span[1]:
+			self.model.extend_window(days_after=WINDOW_PAGE_DAYS)
+			self.headers.prepare(self.model.dates.range(end, self.model.window[1]), self.parent.today, DISPLAY_WEEKDAY)
+			self.model.take_changes()
+			scrollview.reload_data()
 		
-		deleted_dates = set()
-		extra_dates = set()
-		if self.editing_reminder is not None:
-			reminder.start_date = self.editing_reminder.start_date if self.editing_reminder.start_date != 'Remember' else date
-			
-			if date == self.editing_date and self.editing_reminder.repeat == [] and repeat == []:
-				self.events[date][self.events[date].index(self.editing_reminder)] = reminder
-				self.editing_date = None
-				self.editing_reminder = None
-				return
-			
-			if repeat:
-				if date.weekday() not in repeat:
-					extra_dates.add(date)
-					
-				if date != self.editing_date:
-					deleted_dates.add(self.editing_date)
-					do_not_delete = date
-				else:
-					do_not_delete = None
-						
-				if self.editing_date != 'Remember':
-					date = self.editing_date if self.editing_reminder.repeat == [] else reminder.start_date
-				
-				if self.editing_reminder.repeat:
-					while date <= self.editing_reminder.end_date:
-						if date.weekday() in repeat:
-							if date in self.events.keys():
-								if not any(e.equal_to(self.editing_reminder) for e in self.events[date]):
-									deleted_dates.add(date)
-							else:
-								deleted_dates.add(date)
-								
-						elif date in self.events.keys() and any(e.equal_to(self.editing_reminder) for e in self.events[date]):
-							extra_dates.add(date)
-							
-						date += timedelta(days=1)
-					
-				if do_not_delete in deleted_dates:
-					deleted_dates.remove(do_not_delete)
-				extra_dates = {d for d in extra_dates if d not in deleted_dates}
-				
-			self.remove_event(self.editing_reminder, self.editing_date, True)
-				
-			self.editing_date = None
-			self.editing_reminder = None
-			
-		if repeat:
-			date = reminder.start_date
-			while date <= end_date:
-				if date not in deleted_dates and date.weekday() in repeat:
-					if date in self.events.keys():
-						self.events[date].append(reminder)
-					else:
-						self.events[date] = [reminder]
-				date += timedelta(days=1)
-				
-			for date in extra_dates:
-				if date in self.events.keys():
-					self.events[date].append(reminder)
-				else:
-					self.events[date] = [reminder]
-				
-		else:
-			if date in self.events.keys():
-				self.events[date].append(reminder)
-			else:
-				self.events[date] = [reminder]
-			
-		self.dates = sorted([i for i in self.events.keys() if i != 'Remember'])
-		if 'Remember' in self.events.keys():
-			self.dates.insert(0, 'Remember')
-			
+	def add_event(self, name, colour, repeat, date, end_date):
+		self.model.add_event(name, colour, repeat, date, end_date, self.editing_reminder, self.editing_date)
 		self.editing_date = None
 		self.editing_reminder = None
-			
-				
-	def remove_event(self, reminder, date, remove_repeats=False):
-		self.events[date].remove(reminder)
-		if not self.events[date]:
-			self.events.pop(date)
-			self.dates.remove(date)
-			
-		if remove_repeats and reminder.repeat != []:
-			self.remove_repeat_events_in_range(reminder, reminder.start_date, reminder.end_date)
-			
-	def remove_repeat_events_in_range(self, event, start, end):
-		date = start
-		while date <= end:
-			if date in self.events.keys():
-				self.events[date] = [e for e in self.events[date] if not e.equal_to(event)]
-				if not self.events[date]:
-					self.events.pop(date)
-					self.dates.remove(date)
-			date += timedelta(days=1)
+		
+	def set_colour_enabled(self, colour, enabled):
+		self.model.set_colour_enabled(colour, enabled)
 		
 	def update(self, tableview=None):
-		self.save()
+		self.model.save()
+		self.parent.update_date_badges()
+		self.write_widget_snapshot()
 		if tableview:
-			tableview.reload_data()
-
-	def load(self):
-		with shelve.open('Remember') as file:
-			if not 'events' in file.keys():
-				file['events'] = {}
-				
-			self.events = file['events']
+			self.apply_changes(tableview)
 			
-			self.dates = sorted([i for i in self.events.keys() if i != 'Remember'])
-			if 'Remember' in self.events.keys():
-				self.dates.insert(0, 'Remember')
-					
-			self.save()
-						
-		self.all_colours = [(1, 1, 1), (1, 0, 0), (1, 0.5, 0),
-		(1, 1, 0), (0, 1, 0), (0, 1, 1), (0, 0, 1), (0, 0, 0)]
-		self.enabled = [True] * len(self.all_colours)
-						
-	def save(self):
-		with shelve.open('Remember', flag='n') as file:
-			file['events'] = self.events
+	def refresh(self, tableview):
+		# Show what other processes, like a second copy of the app, have saved since
+		if self.model.refresh():
+			self.parent.update_date_badges()
+			self.write_widget_snapshot()
+			self.apply_changes(tableview)
+			
+	def write_widget_snapshot(self):
+		sections = self.model.widget_sections(self.parent.today, WIDGET_DAYS, DISPLAY_WEEKDAY)
+		self.widget_snapshot.write([('widget', None, (self.parent.today, sections, self.all_colours))])
+		
+	def apply_changes(self, tableview):
+		# Pythonista tables can only insert or delete rows one batch at a time, anything else is reloaded
+		changes = self.model.take_changes()
+		if changes is None or changes.sections_changed() or changes.moved_rows or (changes.deleted_rows and changes.inserted_rows):
+			tableview.reload_data()
+		elif changes.deleted_rows:
+			tableview.delete_rows(changes.deleted_rows)
+		elif changes.inserted_rows:
+			tableview.insert_rows(changes.inserted_rows)
 			
 	def get_enabled_dates(self):
-		return [d for d in self.dates if any(self.enabled[e.colour] for e in self.events[d])]
+		return self.model.get_enabled_dates()
 		
 	def get_enabled_events(self, date):
-		return [e for e in self.events[date] if self.enabled[e.colour]]
-			
+		return self.model.get_enabled_events(date)
+		
 class NameInputDelegate (object):
 	def __init__(self, parent):
 		self.parent = parent
@@ -338,7 +249,7 @@ class NameInputDelegate (object):
 		return True
 		
 	def textfield_did_change(self, textfield):
-		pass
+		self.parent.show_suggestions(self.parent.reminders_view.data_source.model.complete(textfield.text, SUGGESTION_COUNT))
 		
 class RememberView (ui.View):
 	def __init__(self, *args, **kwargs):
@@ -356,9 +267,6 @@ class RememberView (ui.View):
 		self.reminders_view.allows_selection = True
 		self.add_subview(self.reminders_view)
 		
-		weekday = self.today.weekday()
-		weekdays = ['M', 'T', 'W', 'T', 'F', 'S', 'S']
-		
 		self.button_view = ui.ScrollView()
 		self.button_view.background_color = 'lightgray'
 		self.add_subview(self.button_view)
@@ -377,29 +285,20 @@ class RememberView (ui.View):
 		self.input_view.background_color = 'white'
 		self.add_subview(self.input_view) 
 		
-		button_style = {'background_color': (1, 0, 0, 1), 'tint_color': 'white', 'font': ('HelveticaNeue-Light', 18), 'corner_radius': 3, 'border_width': 1.5}
-		
-		weekdays_wrapped = weekdays[weekday:] + weekdays[:weekday]
-		button_list = weekdays_wrapped + [str((self.today + timedelta(days=n)).day) for n in range(7, 30 if self.today.month in [4, 6, 9, 11] else 31)]
-		
-		remember_button = ui.Button(image=ui.Image.named('typw:Edit'), action=self.remember_button_pressed, name=str('Remember'), **button_style)
+		remember_button = ui.Button(image=ui.Image.named('typw:Edit'), action=self.remember_button_pressed, name=str('Remember'), **ROUND_BUTTON_STYLE)
 		self.date_buttons = [remember_button]
 		self.button_view.add_subview(remember_button)
-	
-		for i, d in enumerate(button_list):
-			b = ui.Button(title=d, action=self.date_button_pressed, name=str(i), **button_style)
-			self.date_buttons.append(b)
-			self.button_view.add_subview(b)
+		self.add_date_buttons()
 			
 		self.repeat_buttons = []
-		for i, d in enumerate(weekdays):
-			b = ui.Button(title=d, action=self.repeat_button_pressed, name=str(i), **button_style)
+		for i, d in enumerate(WEEKDAY_LETTERS):
+			b = ui.Button(title=d, action=self.repeat_button_pressed, name=str(i), **ROUND_BUTTON_STYLE)
 			self.repeat_buttons.append(b)
 			self.input_view.add_subview(b)
 			
 		self.colour_buttons = []
 		for i, c in enumerate(self.reminders_view.data_source.all_colours):
-			b = ui.Button(title='✓', action=self.colour_button_pressed, name=str(i), **button_style)
+			b = ui.Button(title='✓', action=self.colour_button_pressed, name=str(i), **ROUND_BUTTON_STYLE)
 			b.background_color = c
 			b.tint_color = get_text_colour(b.background_color)
 			self.colour_buttons.append(b)
@@ -407,13 +306,13 @@ class RememberView (ui.View):
 			
 		self.choose_colour_buttons = []
 		for i, c in enumerate(self.reminders_view.data_source.all_colours):
-			b = ui.Button(title='✓' if i == 0 else '', action=self.choose_colour_button_pressed, name=str(i), **button_style)
+			b = ui.Button(title='✓' if i == 0 else '', action=self.choose_colour_button_pressed, name=str(i), **ROUND_BUTTON_STYLE)
 			b.background_color = c
 			b.tint_color = get_text_colour(b.background_color)
 			self.choose_colour_buttons.append(b)
 			self.choose_colour_view.add_subview(b)
 			
-		self.edit_button = ui.Button(title='Edit', action=self.edit_button_pressed, **button_style)
+		self.edit_button = ui.Button(title='Edit', action=self.edit_button_pressed, **BUTTON_STYLE)
 		self.top_bar.add_subview(self.edit_button)
 		self.top_bar.add_subview(self.colour_view)
 		
@@ -436,71 +335,83 @@ class RememberView (ui.View):
 		self.repeat_end_date_label = ui.Label(text='End Date:', font=('HelveticaNeue-Light', 18))
 		self.input_view.add_subview(self.repeat_end_date_label)
 		
+		self.suggestion_view = ui.View()
+		self.suggestion_buttons = []
+		for i in range(SUGGESTION_COUNT):
+			b = ui.Button(action=self.suggestion_button_pressed, font=('HelveticaNeue-Light', 16), tint_color='black')
+			self.suggestion_buttons.append(b)
+			self.suggestion_view.add_subview(b)
+		self.suggestion_view.hidden = True
+		
 		self.input_view.add_subview(self.choose_colour_view)
+		self.input_view.add_subview(self.suggestion_view)
 		self.input_view.add_subview(self.name_input)
 		self.input_view.background_color = (1, 1, 1)
 		self.input_view.hidden = True
 		
 		self.daysAway = 0
+		self.laid_out = None  # the layout_frames() result the views were last put in
+		self.update_date_badges()
 		
-	def layout(self):
-		show_repeat_end_date = any(b.border_width > 0 for b in self.repeat_buttons)
-		
-		self.reminders_view.frame = self.bounds.inset(TOP_BAR_HEIGHT, 0, 0, LIST_INSET)
-		
-		for i, button in enumerate(self.date_buttons):
-			button.frame = ui.Rect((self.button_view.bounds.width - DATE_BUTTON_WIDTH) / 2, (DATE_BUTTON_SPACE / 2) + i * (DATE_BUTTON_SPACE + DATE_BUTTON_WIDTH), DATE_BUTTON_WIDTH, DATE_BUTTON_WIDTH)
-			button.corner_radius = button.frame.width / 2
-			
-		
-		self.button_view.frame = self.bounds.inset(TOP_BAR_HEIGHT, self.bounds.width - LIST_INSET, 0, 0)
-		
-		self.button_view.content_size = (self.button_view.frame.width, button.frame.y + button.frame.height + (DATE_BUTTON_SPACE / 2))
-		
-		self.top_bar.frame = self.bounds.inset(0, 0, self.bounds.height - TOP_BAR_HEIGHT, 0)
-		
-		input_view_height = NAME_INPUT_HEIGHT + REPEAT_BAR_HEIGHT + DATE_PICKER_HEIGHT + CHOOSE_COLOUR_BAR_HEIGHT
+	def add_date_buttons(self):
+		# A button for each of the next 30 or so days after the Remember button, the first week by weekday
+		weekday = self.today.weekday()
+		weekdays_wrapped = WEEKDAY_LETTERS[weekday:] + WEEKDAY_LETTERS[:weekday]
+		button_list = weekdays_wrapped + [str((self.today + timedelta(days=n)).day) for n in range(7, 30 if self.today.month in [4, 6, 9, 11] else 31)]
 		
-		if show_repeat_end_date:
-			input_view_height += DATE_PICKER_HEIGHT + NAME_INPUT_HEIGHT
-			self.repeat_end_date_picker.hidden = False
-			self.repeat_end_date_label.hidden = False
-		else:
-			self.repeat_end_date_picker.hidden = True
-			self.repeat_end_date_label.hidden = False
+		for i, d in enumerate(button_list):
+			b = ui.Button(title=d, action=self.date_button_pressed, name=str(i), **ROUND_BUTTON_STYLE)
+			self.date_buttons.append(b)
+			self.button_view.add_subview(b)
 			
-		self.input_view.frame = ui.Rect(0, min(self.height, KEYBOARD_HEIGHT - STATUS_BAR_HEIGHT) - input_view_height, self.width - LIST_INSET, input_view_height)
-	
-		self.name_input.frame = ui.Rect(0, input_view_height - NAME_INPUT_HEIGHT, self.input_view.frame.width, NAME_INPUT_HEIGHT)
-		
-		self.date_picker.frame = ui.Rect(0, 0, self.input_view.frame.width, DATE_PICKER_HEIGHT)
-		
-		self.repeat_end_date_picker.frame = ui.Rect(0, DATE_PICKER_HEIGHT + REPEAT_BAR_HEIGHT + NAME_INPUT_HEIGHT, self.input_view.frame.width, DATE_PICKER_HEIGHT)
-		
-		self.choose_colour_view.frame = ui.Rect(0, input_view_height - NAME_INPUT_HEIGHT - CHOOSE_COLOUR_BAR_HEIGHT, self.input_view.frame.width, CHOOSE_COLOUR_BAR_HEIGHT)
-		
-		self.repeat_end_date_label.frame = ui.Rect(REPEAT_BUTTON_SPACE, DATE_PICKER_HEIGHT + REPEAT_BAR_HEIGHT, self.input_view.frame.width, NAME_INPUT_HEIGHT)
-		
-		self.colour_view.frame = self.top_bar.bounds.inset(0, 0, 0, EDIT_BUTTON_WIDTH + EDIT_BUTTON_SPACE * 2)
-		
-		self.edit_button.frame = ui.Rect(self.top_bar.bounds.width - (EDIT_BUTTON_SPACE + EDIT_BUTTON_WIDTH), (self.top_bar.bounds.height - EDIT_BUTTON_HEIGHT) / 2, EDIT_BUTTON_WIDTH, EDIT_BUTTON_HEIGHT)
+	def check_today(self):
+		# Relabel the dates when the app has been left open past midnight
+		today = date.today()
+		if today == self.today:
+			return
+		self.today = today
+		for b in self.date_buttons[1:]:
+			self.button_view.remove_subview(b)
+		del self.date_buttons[1:]
+		self.add_date_buttons()
+		if self.laid_out is not None:
+			frames, sizes = self.laid_out
+			self.laid_out = ({key: frame for key, frame in frames.items() if key[0] != 'date_buttons'}, sizes)  # the new buttons have no frames yet
+		self.update_date_badges()
+		self.reminders_view.reload_data()  # for Today and Tomorrow in the headers
 		
-		for i, button in enumerate(self.colour_buttons):
-			button.frame = ui.Rect((DATE_BUTTON_SPACE / 2) + i * (DATE_BUTTON_SPACE + DATE_BUTTON_WIDTH), (self.colour_view.bounds.height - DATE_BUTTON_WIDTH) / 2, DATE_BUTTON_WIDTH, DATE_BUTTON_WIDTH)
-			button.corner_radius = button.frame.width / 2
-			
-		for i, button in enumerate(self.choose_colour_buttons):
-			button.frame = ui.Rect((REPEAT_BUTTON_SPACE / 2) + i * (REPEAT_BUTTON_SPACE + DATE_BUTTON_WIDTH), (self.choose_colour_view.bounds.height - DATE_BUTTON_WIDTH) / 2, DATE_BUTTON_WIDTH, DATE_BUTTON_WIDTH)
-			button.corner_radius = button.frame.width / 2
-			
-		self.colour_view.content_size = (self.button_view.frame.width, button.frame.y + button.frame.height + (DATE_BUTTON_SPACE / 2))
-		self.choose_colour_view.content_size = (self.button_view.frame.width, button.frame.y + button.frame.height + (DATE_BUTTON_SPACE / 2))
+	def layout(self):
+		# Only views whose frames differ from the last layout are touched, and nothing at all if no input changed
+		self.check_today()
+		show_repeat_end_date = any(b.border_width > 0 for b in self.repeat_buttons)
+		self.repeat_end_date_picker.hidden = not show_repeat_end_date
 		
-		for i, button in enumerate(self.repeat_buttons):
-			button.frame = ui.Rect((REPEAT_BUTTON_SPACE / 2) + i * (REPEAT_BUTTON_SPACE + DATE_BUTTON_WIDTH), DATE_PICKER_HEIGHT + (REPEAT_BAR_HEIGHT - DATE_BUTTON_WIDTH) / 2, DATE_BUTTON_WIDTH, DATE_BUTTON_WIDTH)
-			button.corner_radius = button.frame.width / 2
+		laid_out = layout_frames(tuple(self.bounds), KEYBOARD_HEIGHT, show_repeat_end_date, not self.suggestion_view.hidden,
+			len(self.date_buttons), len(self.colour_buttons), len(self.suggestion_buttons), len(self.repeat_buttons))
+		if laid_out is self.laid_out:
+			return
+		frames, sizes = laid_out
+		old_frames, old_sizes = self.laid_out or ({}, {})
+		for (name, i), frame in frames.items():
+			if old_frames.get((name, i)) != frame:
+				view = getattr(self, name)
+				(view if i is None else view[i]).frame = frame
+		for name, size in sizes.items():
+			if old_sizes.get(name) != size:
+				getattr(self, name).content_size = size
+		self.laid_out = laid_out
+		
+	def update_date_badges(self):
+		# Outline the sidebar dates that have an event of an enabled colour
+		model = self.reminders_view.data_source.model
+		last = self.today + timedelta(days=len(self.date_buttons) - 2)
+		dates = set(model.enabled_dates_between(self.today, last))
+		self.date_buttons[0].border_width = DATE_BADGE_WIDTH if model.has_enabled_event('Remember') else 0
+		for i, button in enumerate(self.date_buttons[1:]):
+			button.border_width = DATE_BADGE_WIDTH if self.today + timedelta(days=i) in dates else 0
 			
 	def date_button_pressed(self, sender):
+		self.reminders_view.data_source.refresh(self.reminders_view)
 		self.date_picker.date = datetime.combine(self.today + timedelta(days=int(sender.name)), datetime.min.time())
 		self.date_picker.enabled = True
 		
@@ -515,6 +426,7 @@ class RememberView (ui.View):
 			self.layout()
 			
 	def remember_button_pressed(self, sender):
+		self.reminders_view.data_source.refresh(self.reminders_view)
 		self.date_picker.enabled = False
 		
 		if self.input_view.hidden:
@@ -539,9 +451,11 @@ class RememberView (ui.View):
 	def colour_button_pressed(self, sender):
 		checked = sender.title == ''
 		
-		self.reminders_view.data_source.enabled[int(sender.name)] = checked
+		self.reminders_view.data_source.set_colour_enabled(int(sender.name), checked)
 		sender.title = '✓' if checked else ''
-		self.reminders_view.data_source.update(self.reminders_view)
+		self.update_date_badges()
+		self.reminders_view.data_source.write_widget_snapshot()
+		self.reminders_view.data_source.apply_changes(self.reminders_view)  # filters aren't saved, so there is nothing to write
 		
 	def choose_colour_button_pressed(self, sender):
 		if sender.title == '':
@@ -549,6 +463,19 @@ class RememberView (ui.View):
 				b.title = ''
 			sender.title = '✓'
 		
+	def show_suggestions(self, names):
+		# Offer names above the text field, hiding the bar when there are none
+		for i, button in enumerate(self.suggestion_buttons):
+			button.title = names[i] if i < len(names) else ''
+			button.hidden = i >= len(names)
+		if self.suggestion_view.hidden != (not names):
+			self.suggestion_view.hidden = not names
+			self.layout()
+			
+	def suggestion_button_pressed(self, sender):
+		self.name_input.text = sender.title
+		self.show_suggestions([])
+		
 	def show_input_view(self):
 		if self.input_view.hidden:
 			self.input_view.hidden = False
@@ -565,9 +492,13 @@ class RememberView (ui.View):
 			
 	def reminder_entered(self):
 		self.input_view.hidden = True
+		self.show_suggestions([])
 		event_name = self.name_input.text
 		if event_name.isspace() or event_name == '': return
 		self.name_input.text = ''
+		if PROFILER is not None and event_name == PROFILE_COMMAND:
+			self.show_profile()
+			return
 		
 		repeat = []
 		for i, b in enumerate(self.repeat_buttons):
@@ -590,6 +521,17 @@ class RememberView (ui.View):
 		self.reminders_view.data_source.update(self.reminders_view)
 		self.button_view.content_offset = (0, 0)
 		
+	def show_profile(self):
+		profile_view = ui.TextView(name='Profile', editable=False, font=('Menlo', 10))
+		profile_view.text = PROFILER.report(self.reminders_view.data_source.model.gauges())
+		profile_view.present('sheet')
+		
+	def will_close(self):
+		self.reminders_view.data_source.model.flush()
+		self.reminders_view.data_source.widget_snapshot.flush()
+		if PROFILER is not None:
+			PROFILER.export(PROFILE_PATH, self.reminders_view.data_source.model.gauges())
+		
 	def run_as_widget(self):
 		self.isWidget = True
 		
@@ -598,6 +540,7 @@ class RememberView (ui.View):
 		
 		
 def keyboardWillShow_(_self, _cmd, n):
+	from objc_util import ObjCInstance
 	global KEYBOARD_HEIGHT
 	if KEYBOARD_HEIGHT == 0:
 		notification = ObjCInstance(n)
@@ -607,7 +550,13 @@ def keyboardWillShow_(_self, _cmd, n):
 		v.layout()
 	
 def main():
-	global v
+	from objc_util import ObjCClass, create_objc_class
+	global v, PROFILER
+	if PROFILE:
+		PROFILER = Profiler()
+		PROFILER.instrument_core()
+		PROFILER.instrument(ReminderHandler, [n for n in vars(ReminderHandler) if n.startswith(('tableview_', 'scrollview_'))] + ['add_event', 'update', 'set_colour_enabled'])
+		PROFILER.instrument(RememberView, ['layout', 'reminder_entered', 'colour_button_pressed', 'date_button_pressed'])
 	v = RememberView()
 	
 	center = ObjCClass('NSNotificationCenter').defaultCenter()
@@ -0,0 +1,1805 @@
+import io
+import re
+import os
+import json
+import time
+import atexit
+import traceback
+import sys
+import bisect
+import heapq
+import itertools
+import dbm
+import copy
+import uuid
+import zlib
+import pickle
+import sqlite3
+import threading
+import contextlib
+from datetime import date, timedelta
+from collections import deque
+
+try:
+	import fcntl
+except ImportError:
+	fcntl = None  # no locking between processes where there is no flock
+
+JOURNAL_COMPACT_SIZE = 256 * 1024  # Log size in bytes after which it is folded into a new snapshot
+SAVE_DELAY = 0.5  # Seconds without changes before queued changes are written in the background
+SAVE_RETRY_MAX = 60  # Most seconds between attempts to write after writing failed, the wait doubling from SAVE_DELAY
+SAVE_ATTEMPTS = 3  # Failed writes after which flush() gives up and raises the last error
+PROFILE_SAMPLES = 1000  # Latest call times kept per method for percentiles
+CHANGES_FORMAT = 'Remember changes 1'  # first item of the files written by export_changes()
+
+def weekday_mask(weekdays):
+	mask = 0
+	for weekday in weekdays:
+		mask |= 1 << weekday
+	return mask
+	
+	
+def weekday_ordinals(mask, first, last):
+	# Sorted day ordinals from first to last falling on the weekdays in mask. Each weekday is a range stepping by a
+	# week (ordinal 1 was a Monday), so the days are laid out by range and sorted() rather than tested one at a time.
+	runs = [range(first + (weekday - first + 1) % 7, last + 1, 7) for weekday in range(7) if mask >> weekday & 1]
+	if len(runs) == 1:
+		return list(runs[0])
+	return sorted(itertools.chain(*runs))
+	
+	
+# Days from a date to the following ones in the same week (itself included) that fall on the weekdays in mask,
+# indexed by mask * 7 + the date's weekday
+WEEK_OFFSETS = [[i for i in range(7) if mask >> (weekday + i) % 7 & 1] for mask in range(128) for weekday in range(7)]
+
+
+def count_weekdays(mask, first, last):
+	# len(weekday_ordinals(mask, first, last)) without listing them
+	weeks, rest = divmod(max(0, last - first + 1), 7)
+	weekday = (first - 1) % 7
+	return weeks * bin(mask).count('1') + sum(mask >> ((weekday + i) % 7) & 1 for i in range(rest))
+	
+	
+class Reminder (object):
+	__slots__ = ('name', 'colour', 'repeat_mask', 'start_date', 'end_date', 'id', 'exceptions')
+	
+	def __init__(self, name, colour, repeat=(), start_date=None, end_date=None):
+		self.name = sys.intern(name)  # the same names come up again and again
+		self.colour = colour  # index into ReminderModel.all_colours
+		self.repeat_mask = weekday_mask(repeat)  # bit n is set if this event repeats on weekday n
+		self.start_date = start_date  # for repeating events
+		self.end_date = end_date  # for repeating events
+		self.id = uuid.uuid4().hex  # kept when the reminder is edited, shared by every occurrence of a series
+		self.exceptions = set() if self.repeat_mask else None  # dates of deleted or moved occurrences of a repeating event
+		
+	@property
+	def repeat(self):
+		# Weekdays this event repeats on
+		return tuple(i for i in range(7) if self.repeat_mask >> i & 1)
+		
+	def __getstate__(self):
+		return (self.name, self.colour, self.repeat_mask, self.start_date, self.end_date, self.id, self.exceptions)
+		
+	def __setstate__(self, state):
+		if isinstance(state, dict):
+			# Pickled before __slots__, with repeat as a list and possibly no id or exceptions
+			state = (state['name'], state['colour'], weekday_mask(state['repeat']), state['start_date'], state['end_date'],
+					 state.get('id'), state.get('exceptions'))
+		
+		name, self.colour, self.repeat_mask, self.start_date, self.end_date, id, exceptions = state
+		self.name = sys.intern(name)
+		if id is not None:
+			self.id = id
+		self.exceptions = exceptions if exceptions is not None or not self.repeat_mask else set()
+		
+	def occurrences(self, start=None, end=None):
+		# Return the sorted dates between start and end on which this repeating event occurs
+		start = self.start_date if start is None else max(start, self.start_date)
+		end = self.end_date if end is None else min(end, self.end_date)
+		dates = list(map(date.fromordinal, weekday_ordinals(self.repeat_mask, start.toordinal(), end.toordinal())))
+		if self.exceptions:
+			return [d for d in dates if d not in self.exceptions]
+		return dates
+		
+	def count_occurrences(self, start=None, end=None):
+		# len(self.occurrences(start, end)) without making the dates
+		start = self.start_date if start is None else max(start, self.start_date)
+		end = self.end_date if end is None else min(end, self.end_date)
+		skipped = sum(1 for d in self.exceptions if start <= d <= end and self.repeat_mask >> d.weekday() & 1)
+		return count_weekdays(self.repeat_mask, start.toordinal(), end.toordinal()) - skipped
+	
+	def iter_occurrences(self, start=None):
+		# The dates this repeating event occurs on from start, in order and worked out only as they are needed.
+		# Only the matching days of each week are visited, not every day.
+		start = self.start_date if start is None else max(start, self.start_date)
+		first, last = start.toordinal(), self.end_date.toordinal()
+		offsets = WEEK_OFFSETS[self.repeat_mask * 7 + start.weekday()]
+		for week in range(first, last + 1, 7):
+			for offset in offsets:
+				if week + offset > last:
+					return
+				d = date.fromordinal(week + offset)
+				if d not in self.exceptions:
+					yield d
+					
+	def occurs_on(self, date):
+		return self.start_date <= date <= self.end_date and self.repeat_mask >> date.weekday() & 1 and date not in self.exceptions
+	
+	def equal_to(self, other):
+		return self.name == other.name and self.colour == other.colour and self.repeat_mask == other.repeat_mask and self.start_date == other.start_date and self.end_date == other.end_date
+
+
+class Unpickler (pickle.Unpickler):
+	# Reminder used to be defined in the app script, so older files refer to it as __main__ or Remember
+	def find_class(self, module, name):
+		if name == 'Reminder' and module in ('__main__', 'Remember'):
+			return Reminder
+		return pickle.Unpickler.find_class(self, module, name)
+		
+		
+class DateIndex (object):
+	# Dates kept sorted with bisect, with the 'Remember' pseudo-date pinned in front of them
+	def __init__(self, dates=()):
+		self.dates = sorted(d for d in dates if d != 'Remember')
+		self.remember = 'Remember' in dates
+		
+	def __len__(self):
+		return len(self.dates) + self.remember
+		
+	def __iter__(self):
+		if self.remember:
+			yield 'Remember'
+		for d in self.dates:
+			yield d
+			
+	def __contains__(self, date):
+		if date == 'Remember':
+			return self.remember
+		i = bisect.bisect_left(self.dates, date)
+		return i < len(self.dates) and self.dates[i] == date
+		
+	def __getitem__(self, i):
+		if i < 0:
+			i += len(self)
+		if self.remember:
+			if i == 0:
+				return 'Remember'
+			i -= 1
+		if i < 0:
+			raise IndexError('date index out of range')
+		return self.dates[i]
+		
+	def add(self, date):
+		if date == 'Remember':
+			self.remember = True
+		elif date not in self:
+			bisect.insort(self.dates, date)
+			
+	def remove(self, date):
+		if date == 'Remember':
+			if not self.remember:
+				raise ValueError('Remember is not in the index')
+			self.remember = False
+			return
+		i = bisect.bisect_left(self.dates, date)
+		if i == len(self.dates) or self.dates[i] != date:
+			raise ValueError('{} is not in the index'.format(date))
+		del self.dates[i]
+		
+	def index(self, date):
+		if date == 'Remember':
+			if not self.remember:
+				raise ValueError('Remember is not in the index')
+			return 0
+		i = bisect.bisect_left(self.dates, date)
+		if i == len(self.dates) or self.dates[i] != date:
+			raise ValueError('{} is not in the index'.format(date))
+		return i + self.remember
+		
+	def range(self, start, end):
+		# Dates from start to end inclusive, never including 'Remember'
+		return self.dates[bisect.bisect_left(self.dates, start):bisect.bisect_right(self.dates, end)]
+		
+	def remove_before(self, date):
+		# Take out and return every date before date
+		i = bisect.bisect_left(self.dates, date)
+		removed = self.dates[:i]
+		del self.dates[:i]
+		return removed
+		
+		
+class NameIndex (object):
+	# The words of every reminder's name kept sorted, so names can be found by the start of any of their words
+	def __init__(self):
+		self.words = []  # sorted, each word once
+		self.names_by_word = {}  # word: names containing it
+		self.ids_by_name = {}  # name: ids of the reminders called that
+		self.name_of = {}  # id: name
+		self.last_used = {}  # name: latest date it was used on
+		
+	def add(self, reminder):
+		# Also used after an edit, the reminder is indexed under its current name only
+		if self.name_of.get(reminder.id) != reminder.name:
+			self.remove(reminder.id)
+			self.name_of[reminder.id] = reminder.name
+			ids = self.ids_by_name.get(reminder.name)
+			if ids is None:
+				ids = self.ids_by_name[reminder.name] = set()
+				for word in name_words(reminder.name):
+					names = self.names_by_word.get(word)
+					if names is None:
+						names = self.names_by_word[word] = set()
+						bisect.insort(self.words, word)
+					names.add(reminder.name)
+			ids.add(reminder.id)
+		used = reminder.end_date if reminder.repeat_mask else reminder.start_date
+		if used is not None and used != 'Remember' and used > self.last_used.get(reminder.name, date.min):
+			self.last_used[reminder.name] = used
+			
+	def remove(self, reminder_id):
+		name = self.name_of.pop(reminder_id, None)
+		if name is None:
+			return
+		ids = self.ids_by_name[name]
+		ids.discard(reminder_id)
+		if ids:
+			return
+		del self.ids_by_name[name]
+		self.last_used.pop(name, None)
+		for word in name_words(name):
+			names = self.names_by_word[word]
+			names.discard(name)
+			if not names:
+				del self.names_by_word[word]
+				del self.words[bisect.bisect_left(self.words, word)]
+				
+	def prefixed(self, prefix):
+		# Names with a word starting with prefix
+		names = set()
+		for i in range(bisect.bisect_left(self.words, prefix), len(self.words)):
+			if not self.words[i].startswith(prefix):
+				break
+			names |= self.names_by_word[self.words[i]]
+		return names
+		
+	def match(self, text):
+		# Names with a word starting with each word of text
+		names = None
+		for word in name_words(text):
+			found = self.prefixed(word)
+			names = found if names is None else names & found
+			if not names:
+				break
+		return names or set()
+		
+	def ids(self, text):
+		return set().union(*(self.ids_by_name[n] for n in self.match(text)))
+		
+	def complete(self, text, count):
+		# The count names matching text that are used most, and most lately when that is equal
+		names = self.match(text)
+		names.discard(text.strip())
+		return heapq.nlargest(count, names, key=lambda n: (len(self.ids_by_name[n]), self.last_used.get(n, date.min), n))
+		
+		
+def name_words(name):
+	return set(re.findall(r'\w+', name.lower()))
+	
+	
+class Journal (object):
+	# Snapshot of all events plus an append-only log of the dates and series changed since. Several processes can share
+	# the files: a lock file keeps their reads and writes apart, and read_changes() picks up what the others append.
+	def __init__(self, path):
+		self.snapshot_path = path + '.snapshot'
+		self.log_path = path + '.log'
+		self.old_log_path = path + '.log.old'  # log being folded into a snapshot by compact()
+		self.lock_path = path + '.lock'
+		self.compacting = None
+		self.lock = threading.Lock()  # appends can come from a WriteBehind thread while compact() rotates the log
+		self.position = 0  # how far into the log this process has read or written
+		self.log_id = None  # inode of that log, None before it exists
+		self.seen = None  # generation() when this process last caught up with the files
+		
+	@contextlib.contextmanager
+	def locked(self, shared=False):
+		# Held while the files are read or changed, between processes too where flock is available
+		with self.lock, open(self.lock_path, 'a') as file:
+			if fcntl is not None:
+				fcntl.flock(file.fileno(), fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+			yield
+			
+	def generation(self):
+		# Changes whenever any process writes, and only costs two stats
+		return stat_token(self.snapshot_path), stat_token(self.log_path)
+		
+	def changed(self):
+		return self.generation() != self.seen
+		
+	def load(self):
+		with self.locked(shared=True):
+			self.position, self.log_id = 0, None
+			self.seen = self.generation()
+			if not any(os.path.exists(p) for p in (self.snapshot_path, self.log_path, self.old_log_path)):
+				return None
+				
+			events, series = {}, {}
+			if os.path.exists(self.snapshot_path):
+				with open(self.snapshot_path, 'rb') as file:
+					events, series = Unpickler(file).load()
+					
+			for path in (self.old_log_path, self.log_path):
+				if os.path.exists(path):
+					for record in self.read_log(path, 0):
+						series = apply_record(events, series, record)
+		return events, series
+		
+	def read_log(self, path, position):
+		# Records from position on, leaving self.position just after the last whole one when path is the log
+		records = []
+		with open(path, 'rb') as file:
+			file.seek(position)
+			while True:
+				try:
+					records.append(Unpickler(file).load())
+				except EOFError:
+					break
+				except Exception:
+					break  # torn record from a write that never completed
+				position = file.tell()
+			if path == self.log_path:
+				self.position, self.log_id = position, os.fstat(file.fileno()).st_ino
+		return records
+		
+	def read_changes(self):
+		# Records other processes have appended since this one last caught up, or None if the files have been
+		# compacted meanwhile and have to be loaded again
+		with self.locked(shared=True):
+			generation = self.generation()
+			if generation[0] != self.seen[0]:
+				return None
+			if generation[1] is None:
+				records = [] if self.log_id is None else None
+			elif self.log_id is not None and generation[1][0] != self.log_id:
+				records = None
+			else:
+				records = self.read_log(self.log_path, self.position)
+			self.seen = generation
+		return records
+		
+	def write(self, records, events=None, series=None):
+		self.append(records)
+		if events is not None:
+			self.compact_if_needed(events, series)
+			
+	def append(self, records):
+		with self.locked(), open(self.log_path, 'ab') as file:
+			log_id = os.fstat(file.fileno()).st_ino
+			caught_up = file.tell() == self.position and self.log_id in (None, log_id) and self.generation() == self.seen
+			for record in records:
+				pickle.dump(record, file, pickle.HIGHEST_PROTOCOL)
+			file.flush()
+			os.fsync(file.fileno())
+			
+			# With nothing from other processes in between, there is nothing to read back
+			if caught_up:
+				self.position, self.log_id = file.tell(), log_id
+				self.seen = self.generation()
+				
+	def compact_if_needed(self, events, series):
+		if self.log_size() > JOURNAL_COMPACT_SIZE:
+			self.compact(events, series)
+			
+	def log_size(self):
+		return file_size(self.log_path)
+		
+	def size(self):
+		return file_size(self.snapshot_path, self.log_path, self.old_log_path)
+			
+	def compact(self, events, series):
+		if self.compacting is not None and self.compacting.is_alive():
+			return
+			
+		# Copy the state so the UI can keep changing it while the snapshot is written
+		copies = {i: copy.copy(s) for i, s in series.items()}
+		for s in copies.values():
+			s.exceptions = set(s.exceptions)
+		state = ({d: [copies.get(e.id, e) for e in l] for d, l in events.items()}, copies)
+		
+		# Only a process that has read everything written so far can fold it into a snapshot.
+		# An old log left by an interrupted compaction is still needed until a snapshot replaces it.
+		with self.locked():
+			if self.generation() != self.seen:
+				return
+			if not os.path.exists(self.old_log_path) and os.path.exists(self.log_path):
+				os.replace(self.log_path, self.old_log_path)
+				self.position, self.log_id = 0, None
+				self.seen = self.generation()
+			
+		self.compacting = threading.Thread(target=self.write_snapshot, args=(state,))
+		self.compacting.daemon = True
+		self.compacting.start()
+		
+	def write_snapshot(self, state):
+		temp_path = '{}.{}.tmp'.format(self.snapshot_path, os.getpid())
+		with open(temp_path, 'wb') as file:
+			pickle.dump(state, file, pickle.HIGHEST_PROTOCOL)
+			file.flush()
+			os.fsync(file.fileno())
+		with self.locked():
+			caught_up = self.generation() == self.seen
+			os.replace(temp_path, self.snapshot_path)
+			if os.path.exists(self.old_log_path):
+				os.remove(self.old_log_path)
+			if caught_up:
+				self.seen = self.generation()
+			
+	def reset(self, state):
+		# Replace everything on disk with state, used when the stored format changes
+		self.write_snapshot(state)
+		with self.locked():
+			if os.path.exists(self.log_path):
+				os.remove(self.log_path)
+			self.position, self.log_id = 0, None
+			self.seen = self.generation()
+			
+			
+def apply_record(events, series, record):
+	# Apply one log record to a loaded state, returns the series as a legacy record replaces them all
+	if record[0] == 'events':
+		if record[2]:
+			events[record[1]] = record[2]
+		else:
+			events.pop(record[1], None)
+	elif record[0] == 'series':
+		if len(record) == 2:
+			series = record[1]  # the whole list, as written before reminders had ids
+		elif record[2] is not None:
+			series[record[1]] = record[2]
+		else:
+			series.pop(record[1], None)
+	return series
+	
+	
+def stat_token(path):
+	try:
+		st = os.stat(path)
+	except OSError:
+		return None
+	return st.st_ino, st.st_size, st.st_mtime_ns
+	
+	
+class WriteBehind (object):
+	# Wraps a storage so writes are queued, merged per date and series, and done on a background thread once
+	# changes have paused for delay seconds. flush() waits until everything queued is on disk.
+	def __init__(self, storage, delay=SAVE_DELAY):
+		self.storage = storage
+		self.delay = delay
+		self.pending = {}  # latest record for each (kind, key)
+		self.deadline = 0
+		self.writing = False
+		self.flushing = False
+		self.failures = 0  # failed writes in a row
+		self.error = None  # raised by the last of them
+		self.condition = threading.Condition()
+		self.thread = threading.Thread(target=self.run)
+		self.thread.daemon = True
+		self.thread.start()
+		atexit.register(self.flush)
+		
+	def load(self):
+		return self.storage.load()
+		
+	def changed(self):
+		return self.storage.changed()
+		
+	def read_changes(self):
+		return self.storage.read_changes()
+		
+	def reset(self, state):
+		self.flush()
+		self.storage.reset(state)
+		
+	def size(self):
+		return self.storage.size()
+		
+	def write(self, records, events=None, series=None):
+		with self.condition:
+			for record in records:
+				self.pending[record[:2]] = record
+			self.deadline = time.monotonic() + self.delay
+			self.condition.notify_all()
+			
+		# Compaction copies the live events, so it has to start on the caller's thread
+		if events is not None and hasattr(self.storage, 'compact_if_needed'):
+			self.storage.compact_if_needed(events, series)
+			
+	def run(self):
+		while True:
+			with self.condition:
+				# A flush writes at once, but retries after a failed write always wait
+				while not self.pending or ((not self.flushing or self.failures) and time.monotonic() < self.deadline):
+					self.condition.wait(max(0, self.deadline - time.monotonic()) if self.pending else None)
+				records = list(self.pending.values())
+				self.pending = {}
+				self.writing = True
+				
+			try:
+				self.storage.write(records)
+				self.failures = 0
+			except Exception as e:
+				traceback.print_exc()
+				with self.condition:
+					for record in records:
+						self.pending.setdefault(record[:2], record)  # keep anything newer queued meanwhile
+					self.failures += 1
+					self.error = e
+					self.deadline = time.monotonic() + min(self.delay * 2 ** (self.failures - 1), SAVE_RETRY_MAX)
+			finally:
+				with self.condition:
+					self.writing = False
+					self.condition.notify_all()
+					
+	def flush(self):
+		# Raises the storage's error if SAVE_ATTEMPTS writes fail in a row, leaving the changes queued to retry later
+		with self.condition:
+			self.flushing = True
+			self.failures = 0
+			self.deadline = time.monotonic()
+			self.condition.notify_all()
+			try:
+				while (self.pending or self.writing) and self.failures < SAVE_ATTEMPTS:
+					self.condition.wait()
+			finally:
+				self.flushing = False
+			if self.pending:
+				raise self.error
+			
+			
+class SQLiteStorage (object):
+	# Stores series, their exceptions and the events kept under each date as rows, so changes are written row by row.
+	# Offers the same load/write/reset methods as Journal, the model still loads every row and queries them in memory.
+	def __init__(self, path):
+		self.connection = sqlite3.connect(path, check_same_thread=False)
+		with self.connection:
+			self.connection.executescript('''
+				CREATE TABLE IF NOT EXISTS series (id TEXT PRIMARY KEY, name TEXT, colour INTEGER, repeat_mask INTEGER,
+					start_date TEXT, end_date TEXT);
+				CREATE TABLE IF NOT EXISTS exceptions (series_id TEXT, date TEXT, PRIMARY KEY (series_id, date));
+				CREATE TABLE IF NOT EXISTS occurrences (date TEXT, position INTEGER, id TEXT, name TEXT, colour INTEGER,
+					repeat_mask INTEGER, start_date TEXT, end_date TEXT, PRIMARY KEY (date, position));
+			''')
+			
+	def changed(self):
+		# SQLite does the locking between processes, data_version moves on when another connection commits
+		return self.data_version() != self.seen
+		
+	def read_changes(self):
+		# Rows don't say when they were written, so changes are always loaded again in full
+		return None
+		
+	def data_version(self):
+		return self.connection.execute('PRAGMA data_version').fetchone()[0]
+		
+	def load(self):
+		self.seen = self.data_version()
+		if not self.connection.execute('SELECT 1 FROM series UNION ALL SELECT 1 FROM occurrences LIMIT 1').fetchone():
+			return None
+			
+		series = {}
+		for row in self.connection.execute('SELECT name, colour, repeat_mask, start_date, end_date, id FROM series'):
+			series[row[5]] = self.reminder(row, set())
+		for series_id, d in self.connection.execute('SELECT series_id, date FROM exceptions'):
+			series[series_id].exceptions.add(to_date(d))
+			
+		events = {}
+		for row in self.connection.execute('SELECT name, colour, repeat_mask, start_date, end_date, id, date FROM occurrences ORDER BY date, position'):
+			events.setdefault(to_date(row[6]), []).append(series.get(row[5]) or self.reminder(row[:6], None))
+		return events, series
+		
+	def reminder(self, row, exceptions):
+		reminder = Reminder.__new__(Reminder)
+		reminder.__setstate__((row[0], row[1], row[2], to_date(row[3]), to_date(row[4]), row[5], exceptions))
+		return reminder
+		
+	def write(self, records, events=None, series=None):
+		with self.connection:
+			for record in records:
+				if record[0] == 'events':
+					self.write_events(record[1], record[2])
+				else:
+					self.write_series(record[1], record[2])
+					
+	def write_events(self, d, events):
+		self.connection.execute('DELETE FROM occurrences WHERE date = ?', (from_date(d),))
+		self.connection.executemany('INSERT INTO occurrences VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+			[(from_date(d), i, e.id, e.name, e.colour, e.repeat_mask, from_date(e.start_date), from_date(e.end_date)) for i, e in enumerate(events or ())])
+			
+	def write_series(self, series_id, series):
+		self.connection.execute('DELETE FROM series WHERE id = ?', (series_id,))
+		self.connection.execute('DELETE FROM exceptions WHERE series_id = ?', (series_id,))
+		if series is not None:
+			self.connection.execute('INSERT INTO series VALUES (?, ?, ?, ?, ?, ?)',
+				(series.id, series.name, series.colour, series.repeat_mask, from_date(series.start_date), from_date(series.end_date)))
+			self.connection.executemany('INSERT INTO exceptions VALUES (?, ?)', [(series.id, from_date(d)) for d in series.exceptions])
+			
+	def reset(self, state):
+		events, series = state
+		with self.connection:
+			self.connection.executescript('DELETE FROM series; DELETE FROM exceptions; DELETE FROM occurrences;')
+		self.write([('events', d, l) for d, l in events.items()] + [('series', i, s) for i, s in series.items()])
+		
+	def size(self):
+		return self.connection.execute('PRAGMA page_count').fetchone()[0] * self.connection.execute('PRAGMA page_size').fetchone()[0]
+		
+		
+class Archive (object):
+	# Cold storage for past dates, one compressed pickle per month plus one for the past parts of repeating series.
+	# Nothing here is read at startup, months are only unpickled when they are restored.
+	def __init__(self, path):
+		self.path = path + '.archive'
+		
+	def size(self):
+		# dbm keeps its data in one or more files depending on the module behind it
+		return file_size(*(self.path + suffix for suffix in ('', '.db', '.dat', '.dir', '.bak')))
+		
+	def span(self):
+		# First and last archived dates, or None if the archive is empty
+		try:
+			with dbm.open(self.path, 'r') as file:
+				return read_compressed(file, 'span', None)
+		except dbm.error:
+			return None
+		
+	def store(self, events, series):
+		# Add {date: events} and {id: past part of a series} to the archive. Storing the same things twice changes
+		# nothing, so anything left in the live set by an interrupted save can simply be archived again.
+		months = {}
+		for d, l in events.items():
+			months.setdefault(month_key(d), {})[d] = l
+		dates = list(events) + [s.start_date for s in series.values()] + [s.end_date for s in series.values()]
+		if not dates:
+			return
+			
+		with dbm.open(self.path, 'c') as file:
+			span = read_compressed(file, 'span', None)
+			if span is not None:
+				dates += span
+			file['span'] = write_compressed((min(dates), max(dates)))
+			
+			for key, dates in months.items():
+				stored = read_compressed(file, key, {})
+				for d, l in dates.items():
+					ids = set(e.id for e in stored.get(d, ()))
+					stored[d] = stored.get(d, []) + [e for e in l if e.id not in ids]
+				file[key] = write_compressed(stored)
+				
+			if series:
+				stored = read_compressed(file, 'series', {})
+				for i, part in series.items():
+					if i in stored:
+						old = stored[i]
+						part.start_date = min(part.start_date, old.start_date)
+						part.end_date = max(part.end_date, old.end_date)
+						part.exceptions |= old.exceptions
+					stored[i] = part
+				file['series'] = write_compressed(stored)
+				
+	def series_parts(self):
+		# {id: archived past part} of every series
+		try:
+			with dbm.open(self.path, 'r') as file:
+				return read_compressed(file, 'series', {})
+		except dbm.error:
+			return {}
+			
+	def read(self, start):
+		# Everything archived from the month holding start onwards, as ({date: events}, {id: series part})
+		first = start.replace(day=1)
+		events, series = {}, {}
+		try:
+			with dbm.open(self.path, 'r') as file:
+				for key in file.keys():
+					if key not in (b'series', b'span') and key.decode() >= month_key(first):
+						events.update(read_compressed(file, key, {}))
+				for i, part in read_compressed(file, 'series', {}).items():
+					if part.end_date >= first:
+						part.start_date = max(part.start_date, first)
+						part.exceptions = set(d for d in part.exceptions if d >= first)
+						series[i] = part
+		except dbm.error:
+			pass
+		return events, series
+		
+	def remove(self, start):
+		# Drop what read(start) returned, once it is safely back in the live set
+		first = start.replace(day=1)
+		try:
+			with dbm.open(self.path, 'w') as file:
+				for key in [k for k in file.keys() if k not in (b'series', b'span') and k.decode() >= month_key(first)]:
+					del file[key]
+				span = read_compressed(file, 'span', None)
+				if span is not None and span[0] < first:
+					file['span'] = write_compressed((span[0], first - timedelta(days=1)))
+				elif span is not None:
+					del file[b'span']
+				stored = read_compressed(file, 'series', {})
+				for i, part in list(stored.items()):
+					if part.start_date >= first:
+						del stored[i]
+					elif part.end_date >= first:
+						part.end_date = first - timedelta(days=1)
+						part.exceptions = set(d for d in part.exceptions if d < first)
+				file['series'] = write_compressed(stored)
+		except dbm.error:
+			pass
+			
+	def forget(self, reminder_id):
+		# Drop the archived part of a deleted series and its archived moved occurrences. Every month is read, which
+		# only deleting a whole series does.
+		try:
+			with dbm.open(self.path, 'w') as file:
+				for key in [k for k in file.keys() if k not in (b'series', b'span')]:
+					stored = read_compressed(file, key, {})
+					kept = {d: [e for e in l if e.id != reminder_id] for d, l in stored.items()}
+					kept = {d: l for d, l in kept.items() if l}
+					if len(kept) != len(stored) or any(len(kept[d]) != len(stored[d]) for d in kept):
+						if kept:
+							file[key] = write_compressed(kept)
+						else:
+							del file[key]
+				stored = read_compressed(file, 'series', {})
+				if stored.pop(reminder_id, None) is not None:
+					file['series'] = write_compressed(stored)
+		except dbm.error:
+			pass
+			
+			
+class ChangeLog (object):
+	# Which date or series each saved change was to, numbered in order and stamped with (time, origin), so another
+	# store can be brought up to date with only what changed since it last synced. What they hold now is read from the
+	# model when exporting, so only the latest change to each is needed, and the file is rewritten without the older
+	# ones once it holds twice as many entries.
+	def __init__(self, path):
+		self.path = path + '.changes'
+		self.origin = uuid.uuid4().hex  # breaks ties between changes made at the same time elsewhere
+		self.latest = {}  # ('events', date) or ('series', id): (sequence number, stamp, that key, imported) of its latest change
+		self.last = 0  # sequence number of the latest change
+		self.count = 0  # entries in the file
+		self.position = 0  # how far into the file this process has read
+		self.file_id = None
+		
+	@contextlib.contextmanager
+	def locked(self):
+		# The file, locked and with what other processes have added read in
+		while True:
+			file = open(self.path, 'ab+')
+			if fcntl is not None:
+				fcntl.flock(file.fileno(), fcntl.LOCK_EX)
+			token = stat_token(self.path)
+			if token is not None and token[0] == os.fstat(file.fileno()).st_ino:
+				break
+			file.close()  # rewritten by compact() while waiting for the lock
+		with file:
+			self.read(file)
+			yield file
+			
+	def read(self, file):
+		if os.fstat(file.fileno()).st_ino != self.file_id:
+			self.latest, self.last, self.count, self.position = {}, 0, 0, 0
+			self.file_id = os.fstat(file.fileno()).st_ino
+		file.seek(self.position)
+		while True:
+			try:
+				entry = Unpickler(file).load()
+			except Exception:
+				break  # the end, or a torn entry from a write that never completed
+			self.note(entry)
+			self.position = file.tell()
+			
+	def note(self, entry):
+		self.latest[entry[2]] = entry
+		self.last = entry[0]
+		self.count += 1
+		
+	def now(self):
+		return time.time(), self.origin
+		
+	def append(self, changes, imported=False):
+		# Log (stamp, key) pairs
+		with self.locked() as file:
+			for stamp, key in changes:
+				entry = (self.last + 1, stamp, key, imported)
+				pickle.dump(entry, file, pickle.HIGHEST_PROTOCOL)
+				self.note(entry)
+			file.flush()
+			self.position = file.tell()
+			if self.count > 2 * len(self.latest):
+				self.compact()
+				
+	def compact(self):
+		# Called with the lock held
+		temp_path = '{}.{}.tmp'.format(self.path, os.getpid())
+		entries = sorted(self.latest.values(), key=lambda entry: entry[0])
+		with open(temp_path, 'wb') as file:
+			for entry in entries:
+				pickle.dump(entry, file, pickle.HIGHEST_PROTOCOL)
+			self.position = file.tell()
+		os.replace(temp_path, self.path)
+		self.count = len(entries)
+		self.file_id = os.stat(self.path).st_ino
+		
+	def since(self, sequence, imported=True):
+		# (last sequence number, [entries]) with the latest change to each date and series changed after sequence,
+		# leaving out those that were imported from elsewhere if imported is False
+		with self.locked():
+			entries = [e for e in self.latest.values() if e[0] > sequence and (imported or not e[3])]
+			return self.last, sorted(entries, key=lambda entry: entry[0])
+			
+	def newer(self, changes):
+		# The (stamp, record) pairs made elsewhere that win over the latest change logged here to the same date or series
+		with self.locked():
+			return [(stamp, record) for stamp, record in changes if record[:2] not in self.latest or stamp > self.latest[record[:2]][1]]
+			
+			
+def file_size(*paths):
+	return sum(token[1] for token in map(stat_token, paths) if token is not None)  # files can go while summing
+	
+	
+def month_key(d):
+	return '{:04}-{:02}'.format(d.year, d.month)
+	
+	
+def read_compressed(file, key, default):
+	key = key.encode() if isinstance(key, str) else key
+	if key not in file.keys():
+		return default
+	return Unpickler(io.BytesIO(zlib.decompress(file[key]))).load()
+	
+	
+def write_compressed(value):
+	return zlib.compress(pickle.dumps(value, pickle.HIGHEST_PROTOCOL))
+	
+	
+def copy_reminder(reminder):
+	# Series are the only reminders changed in place, through their exceptions
+	if not reminder.repeat_mask:
+		return reminder
+	reminder = copy.copy(reminder)
+	reminder.exceptions = set(reminder.exceptions)
+	return reminder
+	
+	
+def from_date(d):
+	return d if d is None or d == 'Remember' else d.isoformat()
+	
+	
+def to_date(text):
+	return text if text is None or text == 'Remember' else date.fromisoformat(text)
+			
+			
+class ChangeSet (object):
+	# Differences between two snapshots of the enabled view, as the table sees them. Sections are indexes into the old
+	# or new list of dates and rows are (section, row), deleted ones in old terms and inserted ones in new terms.
+	# Rows in deleted or inserted sections aren't listed separately.
+	def __init__(self):
+		self.deleted_sections = []
+		self.inserted_sections = []
+		self.deleted_rows = []
+		self.inserted_rows = []
+		self.moved_rows = []  # ((old section, old row), (new section, new row))
+		
+	def __bool__(self):
+		return bool(self.deleted_sections or self.inserted_sections or self.deleted_rows or self.inserted_rows or self.moved_rows)
+		
+	def sections_changed(self):
+		return bool(self.deleted_sections or self.inserted_sections)
+		
+		
+def row_keys(events):
+	# What identifies each row of a date, a reminder appearing twice under one date is told apart by n
+	keys = []
+	seen = {}
+	for e in events:
+		n = seen[e.id] = seen.get(e.id, -1) + 1
+		keys.append((e.id, n, e.name, e.colour))
+	return tuple(keys)
+	
+	
+def increasing_run(values):
+	# Indexes of a longest increasing subsequence of values
+	tails, tail_indexes, previous = [], [], [None] * len(values)
+	for i, v in enumerate(values):
+		j = bisect.bisect_left(tails, v)
+		if j == len(tails):
+			tails.append(v)
+			tail_indexes.append(i)
+		else:
+			tails[j] = v
+			tail_indexes[j] = i
+		previous[i] = tail_indexes[j - 1] if j else None
+	run = set()
+	i = tail_indexes[-1] if tail_indexes else None
+	while i is not None:
+		run.add(i)
+		i = previous[i]
+	return run
+	
+	
+def diff_views(old, new):
+	# ChangeSet turning old into new, both (dates, {date: row_keys()}) as made by ReminderModel.snapshot()
+	old_dates, old_rows = old
+	new_dates, new_rows = new
+	old_sections = {d: i for i, d in enumerate(old_dates)}
+	new_sections = {d: i for i, d in enumerate(new_dates)}
+	changes = ChangeSet()
+	changes.deleted_sections = [i for i, d in enumerate(old_dates) if d not in new_sections]
+	changes.inserted_sections = [i for i, d in enumerate(new_dates) if d not in old_sections]
+	
+	deleted, inserted = [], []
+	for d in new_dates:
+		if d not in old_sections or old_rows[d] == new_rows[d]:
+			continue
+		old_section, new_section = old_sections[d], new_sections[d]
+		old_keys, new_keys = old_rows[d], new_rows[d]
+		old_positions = {k: i for i, k in enumerate(old_keys)}
+		new_positions = {k: i for i, k in enumerate(new_keys)}
+		deleted += [((old_section, i), k) for i, k in enumerate(old_keys) if k not in new_positions]
+		inserted += [((new_section, i), k) for i, k in enumerate(new_keys) if k not in old_positions]
+		
+		# Rows kept in the longest run that is still in order stay put, the others have moved
+		kept = [k for k in new_keys if k in old_positions]
+		run = increasing_run([old_positions[k] for k in kept])
+		changes.moved_rows += [((old_section, old_positions[k]), (new_section, new_positions[k])) for i, k in enumerate(kept) if i not in run]
+		
+	# A reminder deleted under one date and inserted under another has moved between them. Which copy it is under
+	# each date is left out, as the second copy on one date can become the first on the other.
+	unmatched = {}
+	for path, key in deleted:
+		unmatched.setdefault(key[:1] + key[2:], []).append(path)
+	for path, key in inserted:
+		if unmatched.get(key[:1] + key[2:]):
+			changes.moved_rows.append((unmatched[key[:1] + key[2:]].pop(0), path))
+		else:
+			changes.inserted_rows.append(path)
+	changes.deleted_rows = [path for paths in unmatched.values() for path in paths]
+	changes.deleted_rows.sort()
+	return changes
+	
+	
+WEEKDAY_NAMES = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+MONTH_NAMES = ['January', 'February', 'March', 'April', 'May', 'June', 'July',
+			   'August', 'September', 'October', 'November', 'December']
+RELATIVE_DAY_NAMES = {-1: 'Yesterday - ', 0: 'Today - ', 1: 'Tomorrow - '}
+
+
+def ordinal(n):
+	if n % 10 == 1 and n != 11:
+		return str(n) + 'st'
+	elif n % 10 == 2 and n != 12:
+		return str(n) + 'nd'
+	elif n % 10 == 3 and n != 13:
+		return str(n) + 'rd'
+	return str(n) + 'th'
+	
+	
+DAY_ORDINALS = [ordinal(n) for n in range(32)]
+
+
+def format_header(d, today, display_weekday=True):
+	# Section title for a date, relative to today
+	if d == 'Remember':
+		return d
+	
+	section_name = RELATIVE_DAY_NAMES.get((d - today).days, '')
+	if display_weekday:
+		section_name += WEEKDAY_NAMES[d.weekday()] + ', '
+	section_name += MONTH_NAMES[d.month - 1] + ' ' + DAY_ORDINALS[d.day]
+	
+	if d.year != today.year:
+		section_name += ', ' + str(d.year)
+	
+	return section_name
+	
+	
+def format_headers(dates, today, display_weekday=True):
+	# Titles for a whole run of dates at once
+	return {d: format_header(d, today, display_weekday) for d in dates}
+	
+	
+class HeaderCache (object):
+	# Section titles by date, thrown away when today or the weekday setting changes
+	def __init__(self):
+		self.titles = {}
+		self.key = None
+		
+	def check(self, today, display_weekday):
+		if self.key != (today, display_weekday):
+			self.titles = {}
+			self.key = (today, display_weekday)
+			
+	def get(self, d, today, display_weekday=True):
+		self.check(today, display_weekday)
+		title = self.titles.get(d)
+		if title is None:
+			title = self.titles[d] = format_header(d, today, display_weekday)
+		return title
+		
+	def prepare(self, dates, today, display_weekday=True):
+		self.check(today, display_weekday)
+		self.titles.update(format_headers([d for d in dates if d not in self.titles], today, display_weekday))
+		
+		
+class ReminderModel (object):
+	# Events, repeating series and colour filters, independent of any user interface
+	def __init__(self, path='Remember', storage=None, write_behind=False):
+		# storage defaults to a Journal beside path, anything with the same load/write/reset methods can be used.
+		# With write_behind, saves are queued and written on a background thread, see WriteBehind.
+		self.path = path
+		self.storage = storage if storage is not None else Journal(path)
+		self.archive = Archive(path)
+		self.changes = ChangeLog(path)
+		self.all_colours = [(1, 1, 1), (1, 0, 0), (1, 0.5, 0),
+		(1, 1, 0), (0, 1, 0), (0, 1, 1), (0, 0, 1), (0, 0, 0)]
+		self.enabled = [True] * len(self.all_colours)
+		self.window_view = None  # (dates, {date: events}, {date: colour mask}) for the window, rebuilt lazily after changes
+		self.enabled_view = None  # (enabled dates, {date: enabled events}), filtered lazily from window_view
+		self.window = (None, None)  # only dates in this range are shown, None leaving that side open
+		self.load()
+		if write_behind:
+			self.storage = WriteBehind(self.storage)
+		
+	def add_event(self, name, colour, repeat, date, end_date, old=None, old_date=None):
+		# old and old_date are the reminder being edited and the date it was selected on, if any
+		if not repeat:
+			end_date = date
+			
+		# A moved occurrence left behind by a series that no longer exists is edited like a one-off
+		series_edit = old is not None and old.repeat and old.id in self.series
+		
+		if series_edit and repeat:
+			# Editing a series only changes its rule in place. Its start, deleted and moved occurrences stay as they
+			# are, and moved occurrences are the same object, so nothing is expanded or rewritten per date.
+			series = self.series[old.id]
+			series.name = sys.intern(name)
+			self.names.add(series)
+			if colour != series.colour:
+				for d in self.event_dates.get(series.id, ()):
+					for e in self.events[d]:
+						if e.id == series.id:
+							self.count_colour(d, series.colour, -1)
+							self.count_colour(d, colour, 1)
+			series.colour = colour
+			series.repeat_mask = weekday_mask(repeat)
+			series.end_date = end_date
+			if date != old_date:
+				self.remove_event(series, old_date)
+				if date != 'Remember' and date.weekday() in repeat and series.start_date <= date <= series.end_date:
+					series.exceptions.discard(date)
+				else:
+					self.insert_event(series, date)
+			elif date != 'Remember' and date.weekday() not in repeat and date not in self.event_dates.get(series.id, ()):
+				# The occurrence being edited stays on its date after its weekday is unticked
+				series.exceptions.add(date)
+				self.insert_event(series, date)
+			self.mark_changed(series=series)
+			return
+		
+		reminder = Reminder(name, colour, repeat, date, end_date)
+		
+		if old is not None:
+			if not series_edit:
+				reminder.id = old.id  # an edited series is removed everywhere and what replaces it is a new reminder
+				if not repeat and date == old_date:
+					self.events[date][self.events[date].index(old)] = reminder
+					self.names.add(reminder)
+					self.count_colour(date, old.colour, -1)
+					self.count_colour(date, colour, 1)
+					self.mark_changed(date)
+					return
+					
+			self.remove_event(old, old_date, series_edit)
+			
+		if repeat:
+			self.series[reminder.id] = reminder
+			self.names.add(reminder)
+			self.mark_changed(series=reminder)
+			if old is not None and date != 'Remember' and date.weekday() not in repeat:
+				# The event being edited stays on its date, as a moved occurrence of the series it became
+				reminder.exceptions.add(date)
+				self.insert_event(reminder, date)
+		else:
+			self.insert_event(reminder, date)
+			
+	def insert_event(self, reminder, date, index=None):
+		if date not in self.events.keys():
+			self.events[date] = []
+			self.dates.add(date)
+		
+		if index is None:
+			self.events[date].append(reminder)
+		else:
+			self.events[date].insert(index, reminder)
+		self.event_dates.setdefault(reminder.id, set()).add(date)
+		self.names.add(reminder)
+		self.count_colour(date, reminder.colour, 1)
+		self.mark_changed(date)
+			
+	def add_reminders(self, reminders):
+		# Add many new reminders at once, one-offs on their start date, sorting the date index a single time
+		new_dates = []
+		for reminder in reminders:
+			self.names.add(reminder)
+			if reminder.repeat:
+				self.series[reminder.id] = reminder
+				self.changed_series.add(reminder.id)
+				self.series_bounds = None
+				continue
+				
+			date = reminder.start_date
+			if date not in self.events.keys():
+				self.events[date] = []
+				new_dates.append(date)
+			self.events[date].append(reminder)
+			self.event_dates.setdefault(reminder.id, set()).add(date)
+			self.count_colour(date, reminder.colour, 1)
+			self.changed_dates.add(date)
+			
+		if new_dates:
+			self.dates = DateIndex(list(self.dates) + new_dates)
+		self.invalidate()
+		
+	def move_event(self, reminder, from_date, date, index):
+		self.remove_event(reminder, from_date)  # a moved repeat occurrence becomes an exception of its series
+		self.insert_event(reminder, date, index)
+		
+	def remove_event(self, reminder, date, remove_repeats=False):
+		events = self.events.get(date, [])
+		i = next((i for i, e in enumerate(events) if e.id == reminder.id), None)
+		if i is not None:
+			self.count_colour(date, events[i].colour, -1)
+			del events[i]
+			if not any(e.id == reminder.id for e in events):
+				self.forget_date(reminder.id, date)
+			if not events:
+				self.events.pop(date)
+				self.dates.remove(date)
+			self.mark_changed(date)
+		elif reminder.repeat_mask:
+			reminder.exceptions.add(date)  # occurrence generated by a repeating series
+			self.mark_changed(series=reminder)
+			
+		if remove_repeats and reminder.repeat:
+			self.remove_repeat_events_in_range(reminder, reminder.start_date, reminder.end_date)
+			
+	def remove_repeat_events_in_range(self, event, start, end):
+		series = self.series.get(event.id)
+		whole = series is None or start <= series.start_date and series.end_date <= end
+		if series is not None:
+			if whole:
+				self.series.pop(event.id)
+				self.forget_name(event.id)
+				if self.archived_span is not None:
+					self.archive.forget(event.id)  # or paging back would bring its past back
+			elif start <= series.start_date <= end:
+				series.start_date = end + timedelta(days=1)  # cut off the front rather than listing it as exceptions
+				series.exceptions = set(d for d in series.exceptions if d > end)
+			elif start <= series.end_date <= end:
+				series.end_date = start - timedelta(days=1)
+				series.exceptions = set(d for d in series.exceptions if d < start)
+			else:
+				series.exceptions.update(series.occurrences(start, end))
+			self.mark_changed(series=series)
+				
+		# Occurrences moved off their series' days are found through the reverse index. Once the whole series is gone
+		# so are those moved outside its range or to Remember, or they would be left repeating without a series.
+		for date in [d for d in self.event_dates.get(event.id, ()) if whole or d != 'Remember' and start <= d <= end]:
+			for e in self.events[date]:
+				if e.id == event.id:
+					self.count_colour(date, e.colour, -1)
+			self.events[date] = [e for e in self.events[date] if e.id != event.id]
+			self.forget_date(event.id, date)
+			self.mark_changed(date)
+			if not self.events[date]:
+				self.events.pop(date)
+				self.dates.remove(date)
+				
+	def count_colour(self, date, colour, change):
+		# Keeps how many events of each colour are stored under a date, and a mask of the colours present
+		counts = self.colour_counts.get(date)
+		if counts is None:
+			counts = self.colour_counts[date] = [0] * len(self.all_colours)
+		counts[colour] += change
+		if counts[colour]:
+			mask = self.colour_masks.get(date, 0) | 1 << colour
+		else:
+			mask = self.colour_masks.get(date, 0) & ~(1 << colour)
+		if mask:
+			self.colour_masks[date] = mask
+		else:
+			self.colour_masks.pop(date, None)
+			self.colour_counts.pop(date, None)
+			
+	def forget_date(self, reminder_id, date):
+		dates = self.event_dates[reminder_id]
+		dates.discard(date)
+		if not dates:
+			self.event_dates.pop(reminder_id)
+			self.forget_name(reminder_id)
+			
+	def forget_name(self, reminder_id):
+		if reminder_id not in self.series and reminder_id not in self.event_dates:
+			self.names.remove(reminder_id)
+		
+	def load(self):
+		state = self.storage.load()
+		if state is None:
+			# Nothing stored yet, carry over what the default journal or a shelve from older versions holds
+			if not isinstance(self.storage, Journal):
+				state = Journal(self.path).load()
+			if state is None:
+				state = self.load_shelve()
+			self.events, self.series = self.assign_ids(*state)
+			self.storage.reset((self.events, self.series))
+		elif isinstance(state[1], list):
+			self.events, self.series = self.assign_ids(*state)
+			self.storage.reset((self.events, self.series))
+		else:
+			self.events, self.series = state
+			
+		# Log records are pickled separately, so moved repeat occurrences are reattached to their series
+		self.event_dates = {}
+		self.colour_counts = {}
+		self.colour_masks = {}
+		self.names = NameIndex()
+		for d, events in self.events.items():
+			for i, e in enumerate(events):
+				if e.id in self.series:
+					events[i] = self.series[e.id]
+				self.event_dates.setdefault(e.id, set()).add(d)
+				self.names.add(events[i])
+				self.count_colour(d, events[i].colour, 1)
+		for s in self.series.values():
+			self.names.add(s)
+				
+		self.dates = DateIndex(self.events.keys())
+		self.changed_dates = set()
+		self.changed_series = set()
+		self.archived_span = self.archive.span()
+		self.series_bounds = None  # [earliest start, latest end] of the series, worked out when next needed
+		self.shown = None  # snapshot() as of the last take_changes()
+						
+	def archive_before(self, before):
+		# Move every date before before, and the part of each repeating series before it, out to the archive.
+		# Series that have ended are dropped from the live set, the rest now start on before. An ended series with
+		# occurrences moved to dates still live stays, so they keep belonging to it.
+		self.save()
+		removed = self.dates.remove_before(before)
+		events = {}
+		for d in removed:
+			events[d] = [copy_reminder(e) for e in self.events.pop(d)]
+			for i in set(e.id for e in events[d]):  # a date can hold two moved occurrences of one series
+				self.forget_date(i, d)
+			self.colour_counts.pop(d, None)
+			self.colour_masks.pop(d, None)
+			self.mark_changed(d)
+			
+		series = {}
+		for s in list(self.series.values()):
+			if s.start_date >= before:
+				continue
+			part = copy_reminder(s)
+			part.end_date = min(s.end_date, before - timedelta(days=1))
+			part.exceptions = set(d for d in s.exceptions if d < before)
+			if part.occurrences():
+				series[s.id] = part
+			if s.end_date < before and not self.event_dates.get(s.id):
+				self.series.pop(s.id)
+				self.forget_name(s.id)
+			else:
+				s.start_date = before
+				s.exceptions = set(d for d in s.exceptions if d >= before)
+			self.mark_changed(series=s)
+			
+		if events or series:
+			self.archive.store(events, series)  # archived before the live set forgets it
+			self.save(log=False)
+			self.archived_span = self.archive.span()
+			
+	def restore_archived(self, start):
+		# Page archived history from start's month onwards back into the live set, returns whether there was any
+		if self.archived_span is None or self.archived_span[1] < start.replace(day=1):
+			return False
+		events, series = self.archive.read(start)
+		self.save()
+		
+		for part in series.values():
+			live = self.series.get(part.id)
+			if live is not None:
+				live.start_date = min(live.start_date, part.start_date)
+				live.exceptions |= part.exceptions
+				self.mark_changed(series=live)
+				continue
+				
+			# A series that had ended, its moved occurrences still in the live set are the same series again
+			self.series[part.id] = part
+			self.names.add(part)
+			for d in self.link_series(part):
+				self.mark_changed(d)
+			self.mark_changed(series=part)
+			
+		for d in sorted(events):
+			ids = set(e.id for e in self.events.get(d, ()))
+			for e in events[d]:
+				if e.id not in ids:
+					self.insert_event(self.series.get(e.id, e), d)
+					
+		self.flush(log=False)  # the live set has to hold it all before the archive lets go
+		self.archive.remove(start)
+		self.archived_span = self.archive.span()
+		return True
+		
+	def link_series(self, series):
+		# Make the occurrences of series moved to other dates the series object itself, returns those dates
+		dates = self.event_dates.get(series.id, set())
+		for d in dates:
+			l = self.events[d]
+			for i, e in enumerate(l):
+				if e.id == series.id:
+					self.count_colour(d, e.colour, -1)
+					self.count_colour(d, series.colour, 1)
+					l[i] = series
+		return dates
+		
+	def refresh(self):
+		# Catch up with what other processes have saved, returns whether there was anything. Only the dates and series
+		# in their new log records are replaced, everything is loaded again if the files were compacted meanwhile.
+		if not hasattr(self.storage, 'changed') or not self.storage.changed():
+			return False
+		self.flush()  # this process's edits go to disk first, so replaying the log in order leaves both agreeing
+		records = self.storage.read_changes()
+		if records is None or any(r[0] == 'series' and len(r) == 2 for r in records):
+			self.load()
+		else:
+			for record in records:
+				self.replace(record)
+		self.invalidate()
+		return True
+		
+	def export_changes(self, path, since=0, imported=True):
+		# Write the changes saved after sequence number since to path, for import_changes() on another device.
+		# Changes imported from elsewhere are passed on too unless imported is False, for when every device reads
+		# every other's files anyway. Returns the sequence number to export from next time.
+		self.save()
+		last, entries = self.changes.since(since, imported)
+		changes = []
+		parts = None
+		for sequence, stamp, (kind, key), _ in entries:
+			if kind == 'series':
+				series = self.series.get(key)
+				if series is not None and self.archived_span is not None:
+					# Sent whole, with the part archived here, as the other side may not have archived it
+					if parts is None:
+						parts = self.archive.series_parts()
+					if key in parts and parts[key].start_date < series.start_date:
+						series = copy_reminder(series)
+						series.start_date = parts[key].start_date
+						series.exceptions |= parts[key].exceptions
+				changes.append((stamp, (kind, key, series)))
+			elif key in self.events:
+				changes.append((stamp, (kind, key, self.events[key])))
+			elif key == 'Remember' or self.archived_span is None or key > self.archived_span[1]:
+				changes.append((stamp, (kind, key, None)))  # dates only gone into the archive here are left alone
+				
+		temp_path = path + '.tmp'
+		with open(temp_path, 'wb') as file:
+			file.write(write_compressed((CHANGES_FORMAT, since, last, changes)))
+		os.replace(temp_path, path)
+		return last
+		
+	def import_changes(self, path):
+		# Apply a file written by export_changes(), returns how many changes were applied. Where both sides changed
+		# the same date or series the later change wins, so importing a file twice or back where it came from does nothing.
+		with open(path, 'rb') as file:
+			state = Unpickler(io.BytesIO(zlib.decompress(file.read()))).load()
+		if state[0] != CHANGES_FORMAT:
+			raise ValueError('not a change file')
+		self.save()
+		changes = self.changes.newer(state[3])
+		for stamp, record in changes:
+			self.replace(record)
+			(self.changed_dates if record[0] == 'events' else self.changed_series).add(record[1])
+		if changes:
+			self.changes.append([(stamp, record[:2]) for stamp, record in changes], imported=True)
+			self.save(log=False)
+			self.invalidate()
+		return len(changes)
+		
+	def replace(self, record):
+		# Apply a record as the journal stores them
+		if record[0] == 'events':
+			self.replace_date(record[1], record[2])
+		else:
+			self.replace_series(record[1], record[2])
+			
+	def replace_date(self, date, events):
+		# Put back a date as another process saved it
+		for e in self.events.pop(date, ()):
+			if date in self.event_dates.get(e.id, ()):
+				self.forget_date(e.id, date)
+		self.colour_counts.pop(date, None)
+		self.colour_masks.pop(date, None)
+		if events:
+			self.events[date] = [self.series.get(e.id, e) for e in events]
+			self.dates.add(date)
+			for e in self.events[date]:
+				self.event_dates.setdefault(e.id, set()).add(date)
+				self.names.add(e)
+				self.count_colour(date, e.colour, 1)
+		elif date in self.dates:
+			self.dates.remove(date)
+			
+	def replace_series(self, series_id, series):
+		self.series_bounds = None
+		if series is None:
+			if self.series.pop(series_id, None) is not None:
+				self.forget_name(series_id)
+		elif series_id in self.series:
+			# Changed in place, as the UI may be holding on to the series
+			live = self.series[series_id]
+			if series.colour != live.colour:
+				for d in self.event_dates.get(series_id, ()):
+					for e in self.events[d]:
+						if e is live:
+							self.count_colour(d, live.colour, -1)
+							self.count_colour(d, series.colour, 1)
+			live.__setstate__(series.__getstate__())
+			self.names.add(live)
+		else:
+			self.series[series_id] = series
+			self.names.add(series)
+			self.link_series(series)
+			
+	def set_colour_enabled(self, colour, enabled):
+		# Only the filtered view is dropped, the events in the window and their colour masks stay valid
+		self.enabled[colour] = enabled
+		self.enabled_view = None
+		
+	def set_window(self, start=None, end=None):
+		self.window = (start, end)
+		self.invalidate()
+		
+	def extend_window(self, days_before=0, days_after=0):
+		# Page more dates into an existing window
+		start, end = self.window
+		if start is not None and days_before:
+			start -= timedelta(days=days_before)
+		if end is not None and days_after:
+			end += timedelta(days=days_after)
+		self.set_window(start, end)
+		
+	def date_span(self):
+		# First and last dates holding any event, or None if there are none. Asked for on every scroll, so the
+		# series' bounds are only worked out again after a series has changed.
+		if self.series_bounds is None:
+			series = self.series.values()
+			self.series_bounds = [min(s.start_date for s in series), max(s.end_date for s in series)] if series else []
+		dates = self.series_bounds + self.dates.dates[:1] + self.dates.dates[-1:]
+		if self.archived_span is not None:
+			dates.append(self.archived_span[0])
+		if not dates:
+			return None
+		return min(dates), max(dates)
+		
+	def invalidate(self):
+		self.window_view = None
+		self.enabled_view = None
+		
+	def get_window_view(self):
+		if self.window_view is None:
+			start, end = self.window
+			dates = self.dates.range(start or date.min, end or date.max)
+			if 'Remember' in self.dates:
+				dates.insert(0, 'Remember')
+			events = {d: list(self.events[d]) for d in dates}
+			masks = {d: self.colour_masks[d] for d in dates}
+			
+			# Repeating events are only expanded here, into the dates being displayed
+			for series in self.series.values():
+				bit = 1 << series.colour
+				for d in series.occurrences(start, end):
+					if d in events:
+						events[d].append(series)
+						masks[d] |= bit
+					else:
+						events[d] = [series]
+						masks[d] = bit
+						
+			self.window_view = (DateIndex(events.keys()), events, masks)
+		return self.window_view
+		
+	def get_enabled_view(self):
+		# Toggling a colour only repeats this, one mask test per date in the window
+		if self.enabled_view is None:
+			dates, events, masks = self.get_window_view()
+			enabled = self.enabled_mask()
+			self.enabled_view = (DateIndex([d for d in dates if masks[d] & enabled]), {})
+		return self.enabled_view
+		
+	def migrate_repeats(self):
+		# Older files stored every occurrence of a repeating event under its own date, turn them back into series
+		series = {}
+		for events in self.events.values():
+			for e in events:
+				if e.repeat:
+					series[id(e)] = e
+					
+		for s in series.values():
+			s.exceptions = set()
+			for date in s.occurrences():
+				if date in self.events.keys() and any(e is s for e in self.events[date]):
+					self.events[date] = [e for e in self.events[date] if e is not s]
+					if not self.events[date]:
+						self.events.pop(date)
+				else:
+					s.exceptions.add(date)
+				
+		return list(series.values())
+		
+	def load_shelve(self):
+		# Files written before the journal existed kept everything in a shelve under 'events'
+		try:
+			with dbm.open(self.path, 'r') as file:
+				self.events = Unpickler(io.BytesIO(file[b'events'])).load() if b'events' in file.keys() else {}
+				if b'series' in file.keys():
+					self.series = Unpickler(io.BytesIO(file[b'series'])).load()
+				else:
+					self.series = self.migrate_repeats()
+		except dbm.error:
+			self.events = {}
+			self.series = []
+		return self.events, self.series
+			
+	def assign_ids(self, events, series):
+		# Reminders saved before ids existed get one, moved repeat occurrences are matched to their series by value
+		if isinstance(series, dict):
+			series = list(series.values())
+		for s in series:
+			if not hasattr(s, 'id'):
+				s.id = uuid.uuid4().hex
+		for l in events.values():
+			for i, e in enumerate(l):
+				if not hasattr(e, 'id'):
+					match = next((s for s in series if s.equal_to(e)), None) if e.repeat else None
+					if match is None:
+						e.id = uuid.uuid4().hex
+					else:
+						l[i] = match
+		return events, {s.id: s for s in series}
+		
+	def mark_changed(self, date=None, series=None):
+		# Remember what the next save has to write
+		if date is not None:
+			self.changed_dates.add(date)
+		if series is not None:
+			self.changed_series.add(series.id)
+			self.series_bounds = None
+		self.invalidate()
+		
+	def save(self, log=True):
+		# Records hold copies, so they can be written on another thread while the events keep changing.
+		# log is False for changes that only move things between this device's stores, which aren't synced.
+		records = [('events', d, [copy_reminder(e) for e in self.events[d]] if d in self.events else None) for d in self.changed_dates]
+		records += [('series', i, copy_reminder(self.series[i]) if i in self.series else None) for i in self.changed_series]
+		self.changed_dates = set()
+		self.changed_series = set()
+		
+		if records:
+			self.storage.write(records, self.events, self.series)
+			if log:
+				stamp = self.changes.now()
+				self.changes.append([(stamp, record[:2]) for record in records])
+			
+	def flush(self, log=True):
+		# Save and wait until everything saved so far is on disk
+		self.save(log)
+		if isinstance(self.storage, WriteBehind):
+			self.storage.flush()
+			
+	def get_enabled_dates(self):
+		return self.get_enabled_view()[0]
+		
+	def get_enabled_events(self, date):
+		# Each date's events are filtered the first time they are asked for
+		cache = self.get_enabled_view()[1]
+		events = cache.get(date)
+		if events is None:
+			events = self.get_window_view()[1].get(date, [])
+			if not all(self.enabled):
+				events = [e for e in events if self.enabled[e.colour]]
+			cache[date] = events
+		return events
+		
+	def snapshot(self):
+		dates = list(self.get_enabled_dates())
+		return dates, {d: row_keys(self.get_enabled_events(d)) for d in dates}
+		
+	def take_changes(self):
+		# ChangeSet for the enabled view since the last call, None the first time as there is nothing to compare with
+		new = self.snapshot()
+		old, self.shown = self.shown, new
+		return None if old is None else diff_views(old, new)
+		
+	def widget_sections(self, today, days, display_weekday=True):
+		# [(date, title, [(colour, name)])] of enabled events from today for days days, Remember first. Titles leave out
+		# Today and Tomorrow, as the widget may show them on a later day.
+		sections = []
+		remember = [(e.colour, e.name) for e in self.events.get('Remember', ()) if self.enabled[e.colour]]
+		if remember:
+			sections.append(('Remember', 'Remember', remember))
+		for d, e in self.events_between(today, today + timedelta(days=days - 1)):
+			if sections[-1:] and sections[-1][0] == d:
+				sections[-1][2].append((e.colour, e.name))
+			else:
+				title = format_header(d, today, display_weekday)[len(RELATIVE_DAY_NAMES.get((d - today).days, '')):]
+				sections.append((d, title, [(e.colour, e.name)]))
+		return sections
+		
+	def enabled_mask(self):
+		return weekday_mask(i for i, e in enumerate(self.enabled) if e)
+		
+	def series_between(self, start, end):
+		return [s for s in self.series.values() if s.start_date <= end and s.end_date >= start]
+		
+	def events_between(self, start, end, enabled_only=True):
+		# [(date, reminder)] for every event from start to end inclusive, in date order, with repeats expanded
+		explicit = ((d, e) for d in self.dates.range(start, end) for e in self.events[d])
+		repeats = [zip(s.occurrences(start, end), itertools.repeat(s)) for s in self.series_between(start, end)]
+		events = heapq.merge(explicit, *repeats, key=lambda item: item[0])
+		if enabled_only:
+			return [(d, e) for d, e in events if self.enabled[e.colour]]
+		return list(events)
+		
+	def upcoming(self, start, count, enabled_only=True):
+		# The next count (date, reminder) pairs on or after start. Series are expanded one date at a time as the
+		# merge reaches them, so only about count occurrences are ever worked out.
+		i = bisect.bisect_left(self.dates.dates, start)
+		explicit = ((d, e) for d in self.dates.dates[i:] for e in self.events[d])
+		repeats = [zip(s.iter_occurrences(start), itertools.repeat(s)) for s in self.series.values() if s.end_date >= start]
+		result = []
+		for d, e in heapq.merge(explicit, *repeats, key=lambda item: item[0]):
+			if not enabled_only or self.enabled[e.colour]:
+				result.append((d, e))
+				if len(result) == count:
+					break
+		return result
+		
+	def count_colours(self, start, end):
+		# Number of events of each colour from start to end, from the per-date counts and each series' rule
+		totals = [0] * len(self.all_colours)
+		for d in self.dates.range(start, end):
+			for colour, count in enumerate(self.colour_counts[d]):
+				totals[colour] += count
+		for s in self.series_between(start, end):
+			totals[s.colour] += s.count_occurrences(start, end)
+		return totals
+		
+	def enabled_dates_between(self, start, end):
+		# Dates from start to end with an event of an enabled colour. Read from the enabled view's dates, made from the
+		# colour masks, when the window covers them, so a filter toggle doesn't scan the events again.
+		window_start, window_end = self.window
+		if (window_start is None or window_start <= start) and (window_end is None or end <= window_end):
+			return self.get_enabled_view()[0].range(start, end)
+		return sorted(set(d for d, e in self.events_between(start, end)))
+		
+	def has_enabled_event(self, date):
+		enabled = self.enabled_mask()
+		if self.colour_masks.get(date, 0) & enabled:
+			return True
+		return date != 'Remember' and any(enabled >> s.colour & 1 and s.occurs_on(date) for s in self.series.values())
+		
+	def search(self, text, start=None, end=None):
+		# [(date, reminder)] for the events with a name word starting with each word of text, 'Remember' first and
+		# then by date. Repeating events are expanded from start to end, or over their whole run.
+		ids = self.names.ids(text)
+		results = []
+		for i in ids & self.series.keys():
+			results += zip(self.series[i].occurrences(start, end), itertools.repeat(self.series[i]))
+			
+		dates = self.dates.range(start, end) if start is not None and end is not None else None
+		if dates is not None and len(dates) < len(ids):
+			# Fewer dates in the range than matching reminders, so it is quicker to look through the dates
+			if 'Remember' in self.dates:
+				dates.insert(0, 'Remember')
+			results += [(d, e) for d in dates for e in self.events[d] if e.id in ids]
+		else:
+			for i in ids:
+				for d in self.event_dates.get(i, ()):
+					if d == 'Remember' or (start is None or d >= start) and (end is None or d <= end):
+						results += [(d, e) for e in self.events[d] if e.id == i]
+		results.sort(key=lambda item: date.min if item[0] == 'Remember' else item[0])
+		return results
+		
+	def complete(self, text, count):
+		# Names to offer while text is being typed
+		return self.names.complete(text, count) if text.strip() else []
+		
+	def gauges(self):
+		# Sizes worth watching as the calendar grows
+		counts = [len(l) for l in self.events.values()]
+		return {
+			'dates': len(self.dates),
+			'events': sum(counts),
+			'series': len(self.series),
+			'events_per_date_mean': sum(counts) / len(counts) if counts else 0,
+			'events_per_date_max': max(counts, default=0),
+			'window_dates': len(self.get_window_view()[0]),
+			'storage_bytes': self.storage.size() if hasattr(self.storage, 'size') else None,
+			'archive_bytes': self.archive.size(),
+		}
+		
+		
+class Profiler (object):
+	# Call counts and latencies for methods wrapped by instrument(). Nothing is wrapped unless a Profiler is
+	# created and asked to, so leaving profiling off costs nothing.
+	def __init__(self):
+		self.calls = {}  # name: [calls, total seconds, deque of the latest PROFILE_SAMPLES call times]
+		
+	def instrument(self, cls, names):
+		# Replace methods of cls with timed versions, recorded as 'Class.method'
+		for name in names:
+			function = cls.__dict__.get(name)
+			if function is not None and not hasattr(function, 'profiled'):
+				setattr(cls, name, self.wrap(cls.__name__ + '.' + name, function))
+				
+	def wrap(self, name, function):
+		stats = self.calls.setdefault(name, [0, 0.0, deque(maxlen=PROFILE_SAMPLES)])
+		
+		def timed(*args, **kwargs):
+			start = time.perf_counter()
+			try:
+				return function(*args, **kwargs)
+			finally:
+				seconds = time.perf_counter() - start
+				stats[0] += 1
+				stats[1] += seconds
+				stats[2].append(seconds)
+				
+		timed.__name__ = function.__name__
+		timed.profiled = function
+		return timed
+		
+	def instrument_core(self):
+		# The model's editing and view building paths, and every storage's reads and writes
+		self.instrument(ReminderModel, ['load', 'save', 'flush', 'add_event', 'insert_event', 'add_reminders', 'move_event',
+			'remove_event', 'remove_repeat_events_in_range', 'archive_before', 'restore_archived', 'refresh', 'export_changes',
+			'import_changes', 'get_window_view', 'get_enabled_view', 'get_enabled_events'])
+		for cls in (Journal, SQLiteStorage, WriteBehind):
+			self.instrument(cls, ['load', 'write', 'reset', 'compact', 'write_snapshot'])
+		self.instrument(Archive, ['store', 'read', 'remove'])
+		self.instrument(ChangeLog, ['append', 'compact', 'since'])
+		
+	def stats(self):
+		# {name: {calls, total, mean, p50, p90, p99, max}} in seconds, for the methods called so far
+		result = {}
+		for name, (calls, total, samples) in self.calls.items():
+			if not calls:
+				continue
+			samples = sorted(samples)
+			result[name] = {'calls': calls, 'total': total, 'mean': total / calls, 'max': samples[-1]}
+			for p in (50, 90, 99):
+				result[name]['p{}'.format(p)] = samples[min(len(samples) - 1, len(samples) * p // 100)]
+		return result
+		
+	def export(self, path, gauges=None):
+		with open(path, 'w') as file:
+			json.dump({'time': time.time(), 'calls': self.stats(), 'gauges': gauges or {}}, file, indent=1, sort_keys=True)
+			
+	def report(self, gauges=None):
+		# Plain text summary, slowest total first
+		lines = ['{:<44} {:>7} {:>9} {:>8} {:>8}'.format('method', 'calls', 'total ms', 'p50 ms', 'p99 ms')]
+		for name, s in sorted(self.stats().items(), key=lambda item: -item[1]['total']):
+			lines.append('{:<44} {:>7} {:>9.1f} {:>8.2f} {:>8.2f}'.format(name, s['calls'], s['total'] * 1000, s['p50'] * 1000, s['p99'] * 1000))
+		if gauges:
+			lines.append('')
+			lines += ['{:<44} {}'.format(name, value) for name, value in sorted(gauges.items())]
+		return '\n'.join(lines)
@@ -0,0 +1,172 @@
+import csv
+import re
+from datetime import datetime, timedelta
+from RememberCore import Reminder, WEEK_OFFSETS, weekday_mask
+
+IMPORT_REPEAT_DAYS = 2 * 365  # How long a repeating event with no end date is imported for
+IMPORT_PROGRESS_EVERY = 100  # Rows between calls to the progress callback
+WEEKDAY_CODES = ['MO', 'TU', 'WE', 'TH', 'FR', 'SA', 'SU']
+
+
+def parse_date(text):
+	# Accepts 2024-01-31 and the iCalendar forms 20240131 and 20240131T090000(Z)
+	text = text.strip()
+	if not text:
+		return 'Remember'
+	if '-' in text:
+		return datetime.strptime(text, '%Y-%m-%d').date()
+	return datetime.strptime(text[:8], '%Y%m%d').date()
+
+
+def parse_weekdays(text):
+	# 'MO,WE' or '0 2' style lists of weekdays
+	weekdays = set()
+	for part in re.split('[ ,;]+', text.strip().upper()):
+		if not part:
+			continue
+		if part.isdigit() and int(part) < 7:
+			weekdays.add(int(part))
+		elif part[-2:] in WEEKDAY_CODES:
+			weekdays.add(WEEKDAY_CODES.index(part[-2:]))
+		else:
+			raise ValueError('unknown weekday {!r}'.format(part))
+	return sorted(weekdays)
+
+
+def make_reminder(name, colour, repeat, start_date, end_date=None, exceptions=()):
+	if not name or name.isspace():
+		raise ValueError('event has no name')
+	if not 0 <= colour < 8:
+		raise ValueError('colour {} is not between 0 and 7'.format(colour))
+	if repeat:
+		if start_date == 'Remember':
+			raise ValueError('a repeating event needs a date')
+		if end_date is None:
+			end_date = start_date + timedelta(days=IMPORT_REPEAT_DAYS)
+		if end_date < start_date:
+			raise ValueError('event ends before it starts')
+	else:
+		end_date = start_date
+
+	reminder = Reminder(name.strip(), colour, repeat, start_date, end_date)
+	if repeat:
+		reminder.exceptions.update(exceptions)
+	return reminder
+
+
+def read_csv(file):
+	# Yields (line number, Reminder or ValueError) for a CSV file with a header row naming the columns
+	# name and date, and optionally colour (0-7), repeat (e.g. MO,WE) and end_date
+	rows = csv.DictReader(file)
+	for row in rows:
+		try:
+			row = {k.strip().lower(): (v or '').strip() for k, v in row.items() if k is not None}
+			if 'name' not in row or 'date' not in row:
+				raise ValueError('row needs name and date columns')
+			repeat = parse_weekdays(row.get('repeat', ''))
+			end_date = parse_date(row['end_date']) if row.get('end_date') else None
+			yield rows.line_num, make_reminder(row['name'], int(row.get('colour') or 0), repeat, parse_date(row['date']), end_date)
+		except (ValueError, OverflowError) as e:
+			yield rows.line_num, ValueError(str(e))
+
+
+def unfold(file):
+	# iCalendar continues long lines on the next line with a leading space or tab
+	line_number, current = 0, None
+	for number, line in enumerate(file, 1):
+		line = line.rstrip('\r\n')
+		if line[:1] in (' ', '\t') and current is not None:
+			current += line[1:]
+			continue
+		if current is not None:
+			yield line_number, current
+		line_number, current = number, line
+	if current is not None:
+		yield line_number, current
+
+
+def read_rrule(rule, start_date):
+	# Returns (weekdays, end date) for the weekly and daily rules this app can represent
+	parts = dict(p.split('=', 1) for p in rule.split(';') if '=' in p)
+	if parts.get('INTERVAL', '1') != '1':
+		raise ValueError('only rules repeating every week or day are supported')
+	if parts.get('FREQ') == 'DAILY':
+		weekdays = list(range(7))
+	elif parts.get('FREQ') == 'WEEKLY':
+		weekdays = parse_weekdays(parts['BYDAY']) if 'BYDAY' in parts else [start_date.weekday()]
+		if not weekdays:
+			raise ValueError('BYDAY lists no weekdays')
+	else:
+		raise ValueError('unsupported repeat frequency {!r}'.format(parts.get('FREQ')))
+
+	end_date = None
+	if 'UNTIL' in parts:
+		end_date = parse_date(parts['UNTIL'])
+	elif 'COUNT' in parts:
+		count = int(parts['COUNT'])
+		if count < 1:
+			raise ValueError('COUNT must be at least 1')
+		# Each 7 days from start_date hold one occurrence per weekday, so the last is found without stepping through days
+		weeks, rest = divmod(count - 1, len(weekdays))
+		offsets = WEEK_OFFSETS[weekday_mask(weekdays) * 7 + start_date.weekday()]
+		end_date = start_date + timedelta(days=weeks * 7 + offsets[rest])
+	return weekdays, end_date
+
+
+def unescape(text):
+	return text.replace('\\n', ' ').replace('\\N', ' ').replace('\\,', ',').replace('\\;', ';').replace('\\\\', '\\')
+
+
+def read_ics(file):
+	# Yields (line number, Reminder or ValueError) for every VEVENT in an iCalendar file
+	event = None
+	depth = 0  # components nested in the event, like VALARM, whose properties aren't the event's
+	for line_number, line in unfold(file):
+		name, _, value = line.partition(':')
+		name, _, params = name.partition(';')
+		name = name.upper()
+		if name == 'BEGIN' and value.upper() == 'VEVENT':
+			event, start, depth = {'EXDATE': []}, line_number, 0
+		elif event is None:
+			continue
+		elif name == 'BEGIN':
+			depth += 1
+		elif depth:
+			if name == 'END':
+				depth -= 1
+		elif name == 'END' and value.upper() == 'VEVENT':
+			try:
+				if 'DTSTART' not in event:
+					raise ValueError('event has no DTSTART')
+				start_date = parse_date(event['DTSTART'])
+				repeat, end_date = read_rrule(event['RRULE'], start_date) if 'RRULE' in event else ([], None)
+				exceptions = [parse_date(d) for value in event['EXDATE'] for d in value.split(',')]
+				yield start, make_reminder(unescape(event.get('SUMMARY', '')), 0, repeat, start_date, end_date, exceptions)
+			except (ValueError, KeyError, OverflowError) as e:  # OverflowError from dates past the year 9999
+				yield start, ValueError(str(e))
+			event = None
+		elif name == 'EXDATE':
+			event['EXDATE'].append(value)
+		elif name in ('SUMMARY', 'DTSTART', 'RRULE'):
+			event[name] = value
+
+
+def import_file(model, path, progress=None):
+	# Adds every event in a .ics or .csv file to model in one batch and saves once.
+	# progress(rows read) is called as the file is read. Returns (events added, [(line, error message)]).
+	reader = read_ics if path.lower().endswith('.ics') else read_csv
+	reminders, errors = [], []
+	with open(path, newline='', encoding='utf-8-sig') as file:
+		for i, (line_number, result) in enumerate(reader(file), 1):
+			if isinstance(result, ValueError):
+				errors.append((line_number, str(result)))
+			else:
+				reminders.append(result)
+			if progress and i % IMPORT_PROGRESS_EVERY == 0:
+				progress(i)
+
+	model.add_reminders(reminders)
+	model.save()
+	if progress:
+		progress(len(reminders) + len(errors))
+	return len(reminders), errors
@@ -0,0 +1,67 @@
+import functools
+
+# Where RememberView puts its views, worked out without Pythonista so it can be checked anywhere
+LIST_INSET = 50
+NAME_INPUT_HEIGHT = 35
+DATE_PICKER_HEIGHT = NAME_INPUT_HEIGHT * 4
+REPEAT_BAR_HEIGHT = NAME_INPUT_HEIGHT
+CHOOSE_COLOUR_BAR_HEIGHT = REPEAT_BAR_HEIGHT
+SUGGESTION_BAR_HEIGHT = NAME_INPUT_HEIGHT
+DATE_BUTTON_WIDTH = 30
+DATE_BUTTON_SPACE = 10
+REPEAT_BUTTON_SPACE = 5
+TOP_BAR_HEIGHT = 45
+STATUS_BAR_HEIGHT = 52  # Space allowed for the status bar
+EDIT_BUTTON_WIDTH = 47
+EDIT_BUTTON_HEIGHT = 23
+EDIT_BUTTON_SPACE = 2
+
+
+def button_row(count, space, y):
+	return [(space / 2 + i * (space + DATE_BUTTON_WIDTH), y, DATE_BUTTON_WIDTH, DATE_BUTTON_WIDTH) for i in range(count)]
+
+
+@functools.lru_cache(maxsize=32)
+def layout_frames(bounds, keyboard_height, show_repeat_end_date, show_suggestions, date_buttons=31, colours=8, suggestions=3, repeats=7):
+	# ({(view name, index or None): (x, y, width, height)}, {view name: content size}) for a RememberView with the given
+	# bounds, index numbering the buttons of a row. The same arguments return the same object, so a caller can tell
+	# when nothing has moved.
+	x, y, width, height = bounds
+	frames = {}
+
+	def row(name, rects):
+		frames.update(((name, i), rect) for i, rect in enumerate(rects))
+
+	frames['reminders_view', None] = (x, y + TOP_BAR_HEIGHT, width - LIST_INSET, height - TOP_BAR_HEIGHT)
+	frames['button_view', None] = (x + width - LIST_INSET, y + TOP_BAR_HEIGHT, LIST_INSET, height - TOP_BAR_HEIGHT)
+	frames['top_bar', None] = (x, y, width, TOP_BAR_HEIGHT)
+	dates = [((LIST_INSET - DATE_BUTTON_WIDTH) / 2, DATE_BUTTON_SPACE / 2 + i * (DATE_BUTTON_SPACE + DATE_BUTTON_WIDTH), DATE_BUTTON_WIDTH, DATE_BUTTON_WIDTH)
+		for i in range(date_buttons)]
+	row('date_buttons', dates)
+
+	suggestion_height = SUGGESTION_BAR_HEIGHT if show_suggestions else 0
+	input_height = NAME_INPUT_HEIGHT + REPEAT_BAR_HEIGHT + DATE_PICKER_HEIGHT + CHOOSE_COLOUR_BAR_HEIGHT + suggestion_height
+	if show_repeat_end_date:
+		input_height += DATE_PICKER_HEIGHT + NAME_INPUT_HEIGHT
+	input_width = width - LIST_INSET
+	frames['input_view', None] = (0, min(height, keyboard_height - STATUS_BAR_HEIGHT) - input_height, input_width, input_height)
+	frames['name_input', None] = (0, input_height - NAME_INPUT_HEIGHT, input_width, NAME_INPUT_HEIGHT)
+	frames['date_picker', None] = (0, 0, input_width, DATE_PICKER_HEIGHT)
+	frames['repeat_end_date_picker', None] = (0, DATE_PICKER_HEIGHT + REPEAT_BAR_HEIGHT + NAME_INPUT_HEIGHT, input_width, DATE_PICKER_HEIGHT)
+	frames['repeat_end_date_label', None] = (REPEAT_BUTTON_SPACE, DATE_PICKER_HEIGHT + REPEAT_BAR_HEIGHT, input_width, NAME_INPUT_HEIGHT)
+	frames['suggestion_view', None] = (0, input_height - NAME_INPUT_HEIGHT - suggestion_height, input_width, suggestion_height)
+	row('suggestion_buttons', [(i * input_width / suggestions, 0, input_width / suggestions, suggestion_height) for i in range(suggestions)])
+	frames['choose_colour_view', None] = (0, input_height - NAME_INPUT_HEIGHT - suggestion_height - CHOOSE_COLOUR_BAR_HEIGHT, input_width, CHOOSE_COLOUR_BAR_HEIGHT)
+	row('choose_colour_buttons', button_row(colours, REPEAT_BUTTON_SPACE, (CHOOSE_COLOUR_BAR_HEIGHT - DATE_BUTTON_WIDTH) / 2))
+	row('repeat_buttons', button_row(repeats, REPEAT_BUTTON_SPACE, DATE_PICKER_HEIGHT + (REPEAT_BAR_HEIGHT - DATE_BUTTON_WIDTH) / 2))
+
+	frames['colour_view', None] = (0, 0, width - EDIT_BUTTON_WIDTH - EDIT_BUTTON_SPACE * 2, TOP_BAR_HEIGHT)
+	frames['edit_button', None] = (width - (EDIT_BUTTON_SPACE + EDIT_BUTTON_WIDTH), (TOP_BAR_HEIGHT - EDIT_BUTTON_HEIGHT) / 2, EDIT_BUTTON_WIDTH, EDIT_BUTTON_HEIGHT)
+	row('colour_buttons', button_row(colours, DATE_BUTTON_SPACE, (TOP_BAR_HEIGHT - DATE_BUTTON_WIDTH) / 2))
+
+	last_date = dates[-1]
+	last_colour = frames['choose_colour_buttons', colours - 1]
+	colour_size = (LIST_INSET, last_colour[1] + last_colour[3] + DATE_BUTTON_SPACE / 2)
+	sizes = {'button_view': (LIST_INSET, last_date[1] + last_date[3] + DATE_BUTTON_SPACE / 2),
+		'colour_view': colour_size, 'choose_colour_view': colour_size}
+	return frames, sizes
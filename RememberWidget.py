@@ -0,0 +1,127 @@
+import os
+import mmap
+import struct
+from datetime import date
+
+# Remember.py writes the next few days to Remember.widget after every change, so the widget can show them without
+# loading any events. The file is a header followed by fixed size rows, each a section title or an event.
+SNAPSHOT_PATH = 'Remember.widget'
+SNAPSHOT_MAGIC = b'RMWS'
+SNAPSHOT_VERSION = 1
+HEADER = struct.Struct('<4sHHII24B24x')  # magic, version, unused, today's ordinal, row count, 8 rgb colours
+ROW = struct.Struct('<BBI58s')  # kind, colour, date ordinal (0 for Remember), utf-8 text padded with zeros
+TITLE, EVENT = 0, 1
+RELATIVE_DAY_NAMES = {-1: 'Yesterday - ', 0: 'Today - ', 1: 'Tomorrow - '}
+WIDGET_ROWS = 8  # Rows shown in the widget
+WIDGET_ROW_HEIGHT = 22
+
+
+def encode_text(text, size):
+	# Cut to size bytes without splitting a character
+	data = text.encode('utf-8')
+	while len(data) > size:
+		text = text[:-1]
+		data = text.encode('utf-8')
+	return data
+
+
+def write_snapshot(path, today, sections, colours):
+	# sections are (date or 'Remember', title, [(colour, name)]) as from ReminderModel.widget_sections(),
+	# colours the app's rgb tuples from 0 to 1
+	rgb = [int(round(c * 255)) for colour in colours for c in colour]
+	rows = []
+	for d, title, events in sections:
+		ordinal = 0 if d == 'Remember' else d.toordinal()
+		rows.append(ROW.pack(TITLE, 0, ordinal, encode_text(title, ROW.size - 6)))
+		rows += [ROW.pack(EVENT, colour, ordinal, encode_text(name, ROW.size - 6)) for colour, name in events]
+		
+	temp_path = path + '.tmp'
+	with open(temp_path, 'wb') as file:
+		file.write(HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, 0, today.toordinal(), len(rows), *rgb))
+		file.write(b''.join(rows))
+	os.replace(temp_path, path)
+
+
+class SnapshotFile (object):
+	# Lets the app queue snapshots on a RememberCore.WriteBehind, which only writes the latest once changes pause
+	def __init__(self, path):
+		self.path = path
+
+	def write(self, records):
+		for record in records:
+			write_snapshot(self.path, *record[2])
+
+
+class Snapshot (object):
+	# Read only view of a snapshot file, rows are unpacked straight from the mapped file as they are asked for
+	def __init__(self, path=SNAPSHOT_PATH):
+		with open(path, 'rb') as file:
+			self.map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+		header = HEADER.unpack_from(self.map, 0)
+		if header[0] != SNAPSHOT_MAGIC or header[1] != SNAPSHOT_VERSION:
+			raise ValueError('not a widget snapshot')
+		self.written = date.fromordinal(header[3])
+		self.count = header[4]
+		rgb = header[5:]
+		self.colours = [tuple(c / 255 for c in rgb[i:i + 3]) for i in range(0, 24, 3)]
+
+	def __len__(self):
+		return self.count
+
+	def __getitem__(self, i):
+		if not 0 <= i < self.count:
+			raise IndexError('snapshot row out of range')
+		kind, colour, ordinal, text = ROW.unpack_from(self.map, HEADER.size + i * ROW.size)
+		return kind, colour, date.fromordinal(ordinal) if ordinal else 'Remember', text.rstrip(b'\0').decode('utf-8')
+
+	def rows(self, today):
+		# Rows from today onwards, with Today and Tomorrow worked out again in case the snapshot is from an earlier day
+		skipping = False
+		for i in range(self.count):
+			kind, colour, d, text = self[i]
+			if kind == TITLE:
+				skipping = d != 'Remember' and d < today
+				if not skipping and d != 'Remember':
+					text = RELATIVE_DAY_NAMES.get((d - today).days, '') + text
+			if not skipping:
+				yield kind, colour, text
+
+
+def get_text_colour(colour):
+	luminance = 0.2126 * colour[0] + 0.7152 * colour[1] + 0.0722 * colour[2]
+	return 'black' if luminance > 0.2 else 'lightgrey'
+
+
+def make_view(snapshot, today):
+	import ui
+	view = ui.View(frame=(0, 0, 320, WIDGET_ROWS * WIDGET_ROW_HEIGHT))
+	rows = list(snapshot.rows(today))[:WIDGET_ROWS] if snapshot is not None else []
+	if not rows:
+		rows = [(TITLE, 0, 'Nothing coming up' if snapshot is not None else 'Open Remember to see reminders here')]
+	for i, (kind, colour, text) in enumerate(rows):
+		label = ui.Label(frame=(0, i * WIDGET_ROW_HEIGHT, view.width, WIDGET_ROW_HEIGHT), flex='W', text=text)
+		if kind == TITLE:
+			label.font = ('HelveticaNeue-Medium', 14)
+		else:
+			label.font = ('HelveticaNeue-Light', 14)
+			label.background_color = snapshot.colours[colour]
+			label.text_color = get_text_colour(snapshot.colours[colour])
+		view.add_subview(label)
+	return view
+
+
+def main():
+	import appex
+	try:
+		snapshot = Snapshot()
+	except (OSError, ValueError):
+		snapshot = None
+	view = make_view(snapshot, date.today())
+	if appex.is_widget():
+		appex.set_widget_view(view)
+	else:
+		view.present('sheet')
+
+
+if __name__ == '__main__':
+	main()
@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+# Times the model's hot paths on synthetic calendars and prints the results as JSON, e.g.
+#   python3 benchmarks/benchmark.py --sizes 1000 100000 --output results.json
+# Pythonista's ui and console modules are replaced by small stubs so this runs on plain CPython.
+
+import os
+import sys
+import json
+import time
+import types
+import random
+import argparse
+import platform
+import tempfile
+import tracemalloc
+import subprocess
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+COLOURS = 8
+ONE_OFF_SHARE = 0.5
+WEEKLY_SHARE = 0.3  # the rest are daily repeats
+WEEKLY_SPAN = 364  # days covered by each weekly series
+DAILY_SPAN = 90  # days covered by each daily series
+DATE_RANGE = 2 * 365  # events fall within this many days either side of today
+
+
+def install_stubs():
+	# Just enough of ui and console for ReminderHandler to be created and its callbacks called
+	class Label (object):
+		pass
+
+	class TableViewCell (object):
+		def __init__(self, *args, **kwargs):
+			self.text_label = Label()
+
+	class TableView (object):
+		def reload_data(self):
+			pass
+
+	class View (object):
+		def __init__(self, *args, **kwargs):
+			pass
+
+	ui = types.ModuleType('ui')
+	ui.View = View
+	ui.TableView = TableView
+	ui.TableViewCell = TableViewCell
+	sys.modules['ui'] = ui
+
+	console = types.ModuleType('console')
+	console.alert = lambda *args: 2  # 'Delete All'
+	sys.modules['console'] = console
+
+
+class Parent (object):
+	today = date.today()
+
+	def update_date_badges(self):
+		pass
+
+
+def generate(size, seed):
+	# Return (name, colour, repeat, date, end_date) tuples adding up to roughly size occurrences
+	rng = random.Random(seed)
+	today = Parent.today
+	events = []
+
+	def random_date():
+		return today + timedelta(days=rng.randint(-DATE_RANGE, DATE_RANGE))
+
+	for i in range(int(size * ONE_OFF_SHARE)):
+		d = random_date()
+		events.append(('Event {}'.format(i % 500), rng.randrange(COLOURS), [], d, d))
+
+	for i in range(max(1, int(size * WEEKLY_SHARE / (WEEKLY_SPAN / 7)))):
+		d = random_date()
+		events.append(('Weekly {}'.format(i % 100), rng.randrange(COLOURS), [d.weekday()], d, d + timedelta(days=WEEKLY_SPAN)))
+
+	for i in range(max(1, int(size * (1 - ONE_OFF_SHARE - WEEKLY_SHARE) / DAILY_SPAN))):
+		d = random_date()
+		events.append(('Daily {}'.format(i % 100), rng.randrange(COLOURS), list(range(7)), d, d + timedelta(days=DAILY_SPAN)))
+
+	rng.shuffle(events)
+	return events
+
+
+def timed(results, size, operation, function, count=1):
+	start = time.perf_counter()
+	value = function()
+	seconds = time.perf_counter() - start
+	results.append({'size': size, 'operation': operation, 'seconds': seconds, 'count': count, 'per_call': seconds / count})
+	return value
+
+
+def disk_size(path):
+	return sum(os.path.getsize(os.path.join(path, f)) for f in os.listdir(path))
+
+
+def run(size, seed, results):
+	import Remember
+	from RememberCore import ReminderModel, Reminder
+	from RememberLayout import layout_frames
+
+	events = generate(size, seed)
+	handler = Remember.ReminderHandler(Parent())
+	model = handler.model
+
+	def add_all():
+		for e in events:
+			handler.add_event(*e)
+	timed(results, size, 'add_event', add_all, len(events))
+
+	occurrences = sum(len(l) for l in timed(results, size, 'get_enabled_dates', lambda: model.get_window_view()[1].values()))
+	results.append({'size': size, 'operation': 'occurrences', 'value': occurrences})
+
+	def cells():
+		rows = 0
+		for section in range(min(200, handler.tableview_number_of_sections(None))):
+			handler.tableview_title_for_header(None, section)
+			for row in range(handler.tableview_number_of_rows(None, section)):
+				handler.tableview_cell_for_row(None, section, row)
+				rows += 1
+		return rows
+	rows = cells()
+	timed(results, size, 'tableview_cell_for_row', cells, max(1, rows))
+
+	def layout():
+		layout_frames.cache_clear()  # the view only works them out again when its size, the keyboard or the input bar changes
+		return layout_frames((0, 0, 375, 667), 300, True, False)
+	timed(results, size, 'layout_frames', lambda: [layout() for i in range(100)], 100)
+
+	journal = model.storage.storage  # the Journal behind the handler's WriteBehind
+	timed(results, size, 'save', handler.update)
+	timed(results, size, 'flush', model.flush)
+	if journal.compacting is not None:
+		journal.compacting.join()
+	timed(results, size, 'snapshot', lambda: journal.write_snapshot((model.events, model.series)))
+
+	def toggle():
+		# What a colour button does besides redrawing: the filtered dates, the sidebar badges and a queued widget snapshot
+		badges = (Parent.today, Parent.today + timedelta(days=29))
+		for colour in range(COLOURS):
+			for enabled in (False, True):
+				handler.set_colour_enabled(colour, enabled)
+				model.get_enabled_dates()
+				model.enabled_dates_between(*badges)
+				handler.write_widget_snapshot()
+	timed(results, size, 'colour_toggle', toggle, 2 * COLOURS)
+
+	long_series = [Reminder('Long', 0, weekdays, Parent.today, Parent.today + timedelta(days=3650)) for weekdays in ([0], range(5), range(7))]
+	timed(results, size, 'expand_long_series', lambda: [s.occurrences() for s in long_series], len(long_series))
+	year = (Parent.today - timedelta(days=182), Parent.today + timedelta(days=182))
+	timed(results, size, 'count_colours', lambda: model.count_colours(*year))
+	timed(results, size, 'upcoming', lambda: model.upcoming(Parent.today, 100))
+
+	model.take_changes()
+	model.add_event('Extra', 0, [], Parent.today, Parent.today)
+	timed(results, size, 'take_changes', model.take_changes)
+
+	series = list(model.series.values())[:50]
+	def remove_series():
+		for s in series:
+			model.remove_repeat_events_in_range(s, s.start_date, s.end_date)
+	timed(results, size, 'remove_repeat_events_in_range', remove_series, max(1, len(series)))
+	timed(results, size, 'incremental_save', lambda: (handler.update(), model.flush()))
+
+	if journal.compacting is not None:
+		journal.compacting.join()
+	results.append({'size': size, 'operation': 'disk_bytes', 'value': disk_size('.')})
+
+	timed(results, size, 'load', lambda: ReminderModel('Remember'))
+	tracemalloc.start()
+	loaded = ReminderModel('Remember')
+	results.append({'size': size, 'operation': 'memory_bytes', 'value': tracemalloc.get_traced_memory()[0]})
+	tracemalloc.stop()
+	del loaded
+
+	horizon = Parent.today - timedelta(days=90)
+	# Two occurrences of one series moved onto the same archived date
+	moved = Reminder('Moved', 0, list(range(7)), horizon - timedelta(days=30), horizon + timedelta(days=30))
+	model.add_reminders([moved])
+	model.move_event(moved, moved.start_date, horizon - timedelta(days=10), 0)
+	model.move_event(moved, moved.start_date + timedelta(days=1), horizon - timedelta(days=10), 0)
+	timed(results, size, 'archive_before', lambda: (model.archive_before(horizon), model.flush()))
+	if journal.compacting is not None:
+		journal.compacting.join()
+	timed(results, size, 'load_archived', lambda: ReminderModel('Remember'))
+	timed(results, size, 'restore_archived', lambda: model.restore_archived(horizon - timedelta(days=365)))
+	handler.widget_snapshot.flush()  # before leaving the directory it writes to
+
+
+def git_revision():
+	try:
+		return subprocess.check_output(['git', 'rev-parse', 'HEAD'], cwd=os.path.dirname(os.path.abspath(__file__)), stderr=subprocess.DEVNULL).decode().strip()
+	except (OSError, subprocess.CalledProcessError):
+		return None
+
+
+def main():
+	parser = argparse.ArgumentParser(description='Benchmark the Remember model on synthetic calendars.')
+	parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 100000, 1000000], help='occurrences per calendar')
+	parser.add_argument('--seed', type=int, default=0)
+	parser.add_argument('--output', help='write the JSON results here instead of to stdout')
+	args = parser.parse_args()
+
+	install_stubs()
+	results = []
+	cwd = os.getcwd()
+	for size in args.sizes:
+		with tempfile.TemporaryDirectory() as path:
+			os.chdir(path)
+			try:
+				run(size, args.seed, results)
+			finally:
+				os.chdir(cwd)
+
+	report = {'revision': git_revision(), 'python': platform.python_version(), 'seed': args.seed, 'results': results}
+	if args.output:
+		with open(args.output, 'w') as file:
+			json.dump(report, file, indent=1)
+	else:
+		json.dump(report, sys.stdout, indent=1)
+		print()
+
+
+if __name__ == '__main__':
+	main()
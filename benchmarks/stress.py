@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+# Several processes editing the same files at once, e.g.
+#   python3 benchmarks/stress.py --processes 4 --operations 500
+# Each process only edits its own dates and reminders, saving and picking up the others' changes as it goes.
+# At the end every process and a fresh load must see the same events, and nothing any process saved may be missing.
+# Needs fcntl, so Linux or macOS.
+
+import os
+import sys
+import time
+import random
+import traceback
+import argparse
+import tempfile
+import multiprocessing
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import RememberCore
+from RememberCore import ReminderModel
+
+START = date(2030, 1, 1)
+DAYS = 60  # dates each process picks from
+
+
+def state(model):
+	# Everything saved, in a form that can be compared between processes
+	events = sorted((str(d), [(e.id, e.name, e.colour) for e in l]) for d, l in model.events.items())
+	series = sorted(s.__getstate__()[:5] + (s.id, sorted(s.exceptions)) for s in model.series.values())
+	return events, series
+
+
+def indexes(model):
+	# What the model works out from the events, which a refresh has to keep up to date as well
+	dates = [str(d) for d in model.dates]
+	counts = sorted((str(d), c) for d, c in model.colour_counts.items())
+	names = sorted((i, model.names.name_of[i]) for i in model.names.name_of)
+	return dates, counts, names, sorted((str(d), e.id) for d, e in model.search('p'))
+
+
+def own_state(model, ids):
+	# The parts of state() made by the process that created ids
+	events, series = state(model)
+	events = [(d, [e for e in l if e[0] in ids]) for d, l in events]
+	return [(d, l) for d, l in events if l], [s for s in series if s[5] in ids]
+
+
+def work(path, index, processes, operations, seed, barrier, results):
+	try:
+		edit(path, index, processes, operations, seed, barrier, results)
+	except BaseException:
+		barrier.abort()  # so the others don't wait for this one forever
+		results.put((index, traceback.format_exc()))
+		raise
+
+
+def edit(path, index, processes, operations, seed, barrier, results):
+	rng = random.Random(seed * 1000 + index)
+	model = ReminderModel(path)
+	ids = set()
+	refreshes = 0
+
+	def own_date():
+		return START + timedelta(days=rng.randrange(DAYS) * processes + index)
+
+	for n in range(operations):
+		choice = rng.random()
+		own = [(d, e) for d, l in model.events.items() if d != 'Remember' for e in l if e.id in ids]
+		own_series = [s for s in model.series.values() if s.id in ids]
+		if choice < 0.4 or not own:
+			d = own_date()
+			model.add_event('p{} e{}'.format(index, n), rng.randrange(8), [], d, d)
+			ids.update(e.id for e in model.events[d])
+		elif choice < 0.6:
+			d, e = rng.choice(own)
+			model.remove_event(e, d)
+		elif choice < 0.7:
+			d = own_date()
+			before = set(model.series)
+			model.add_event('p{} s{}'.format(index, n), rng.randrange(8), [d.weekday()], d, d + timedelta(days=70))
+			ids.update(set(model.series) - before)
+		elif choice < 0.8 and own_series:
+			s = rng.choice(own_series)
+			model.add_event(s.name + '+', rng.randrange(8), s.repeat, s.start_date, s.end_date, s, s.start_date)
+		elif own_series:
+			s = rng.choice(own_series)
+			d = next(s.iter_occurrences(s.start_date + timedelta(days=7 * rng.randrange(10))), None)
+			if d is not None:
+				model.remove_event(s, d)
+		ids &= set(model.series) | set(model.event_dates)
+
+		if rng.random() < 0.5:
+			model.save()
+		if rng.random() < 0.3:
+			refreshes += model.refresh()
+		if rng.random() < 0.05:
+			time.sleep(0.001)
+
+	model.flush()
+	if model.storage.compacting is not None:
+		model.storage.compacting.join()
+	barrier.wait()
+	model.refresh()
+	results.put((index, state(model), indexes(model), own_state(model, ids), ids, refreshes))
+
+
+def main():
+	parser = argparse.ArgumentParser(description='Edit one calendar from several processes at once and check they agree.')
+	parser.add_argument('--processes', type=int, default=4)
+	parser.add_argument('--operations', type=int, default=500, help='edits per process')
+	parser.add_argument('--seed', type=int, default=0)
+	parser.add_argument('--compact-size', type=int, default=32768, help='log bytes before compaction, small enough to compact a few times')
+	args = parser.parse_args()
+
+	RememberCore.JOURNAL_COMPACT_SIZE = args.compact_size
+	context = multiprocessing.get_context('fork')
+	with tempfile.TemporaryDirectory() as directory:
+		path = os.path.join(directory, 'Remember')
+		barrier = context.Barrier(args.processes)
+		results = context.Queue()
+		workers = [context.Process(target=work, args=(path, i, args.processes, args.operations, args.seed, barrier, results))
+				   for i in range(args.processes)]
+		start = time.perf_counter()
+		for w in workers:
+			w.start()
+		reports = [results.get() for w in workers]
+		for w in workers:
+			w.join()
+		seconds = time.perf_counter() - start
+
+		loaded = ReminderModel(path)
+		expected = state(loaded)
+		failures = 0
+		for report in sorted(reports, key=lambda r: r[0]):
+			if len(report) == 2:
+				failures += 1
+				print('process {} failed:\n{}'.format(*report))
+				continue
+			index, seen, worked_out, own, ids, refreshes = report
+			agrees = seen == expected and worked_out == indexes(loaded)
+			kept = own == own_state(loaded, ids)
+			failures += not (agrees and kept)
+			print('process {}: {} refreshes, {} reminders, agrees with a fresh load: {}, own edits kept: {}'.format(
+				index, refreshes, len(ids), agrees, kept))
+		print('{} dates and {} series after {} edits in {:.2f}s'.format(
+			len(expected[0]), len(expected[1]), args.processes * args.operations, seconds))
+	sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+	main()
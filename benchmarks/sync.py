@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+# Syncs several calendars through a shared folder with export_changes() and import_changes(), e.g.
+#   python3 benchmarks/sync.py --devices 3 --rounds 20 --size 20000
+# Each device edits its own copy of one calendar, then drops its changes in the folder and applies the others'.
+# Afterwards every device must hold the same events, and each change file should be sized by the edits
+# since the last sync rather than by the calendar.
+
+import os
+import sys
+import random
+import argparse
+import tempfile
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from RememberCore import ReminderModel, Reminder
+from stress import state
+
+START = date(2030, 1, 1)
+DAYS = 365
+
+
+class Device (object):
+	def __init__(self, directory, index):
+		self.index = index
+		os.mkdir(directory)
+		self.model = ReminderModel(os.path.join(directory, 'Remember'))
+		self.exported = 0  # sequence number to export from next time
+		self.imported = set()  # change files already applied
+
+	def edit(self, rng, count):
+		model = self.model
+		for n in range(count):
+			d = START + timedelta(days=rng.randrange(DAYS))
+			choice = rng.random()
+			explicit = model.events.get(d)
+			if choice < 0.5 or not explicit and not model.series:
+				model.add_event('d{} e{}'.format(self.index, n), rng.randrange(8), [], d, d)
+			elif choice < 0.7 and explicit:
+				model.remove_event(rng.choice(explicit), d)
+			elif choice < 0.8 and explicit:
+				model.move_event(explicit[0], d, d + timedelta(days=1), 0)
+			elif choice < 0.9 or not model.series:
+				model.add_event('d{} s{}'.format(self.index, n), rng.randrange(8), [d.weekday()], d, d + timedelta(days=70))
+			else:
+				s = rng.choice(list(model.series.values()))
+				model.add_event(s.name, rng.randrange(8), s.repeat, s.start_date, s.end_date, s, s.start_date)
+			model.save()
+
+	def sync(self, folder, round):
+		# Returns the size of the change file written
+		path = os.path.join(folder, 'device{}-{}.changes'.format(self.index, round))
+		self.exported = self.model.export_changes(path, self.exported, imported=False)  # the others read every file
+		self.imported.add(path)
+		applied = 0
+		for name in sorted(os.listdir(folder)):
+			other = os.path.join(folder, name)
+			if other not in self.imported:
+				applied += self.model.import_changes(other)
+				self.imported.add(other)
+		return os.path.getsize(path), applied
+
+
+def main():
+	parser = argparse.ArgumentParser(description='Sync calendars through a shared folder and check they agree.')
+	parser.add_argument('--devices', type=int, default=3)
+	parser.add_argument('--rounds', type=int, default=20)
+	parser.add_argument('--edits', type=int, default=20, help='edits per device between syncs')
+	parser.add_argument('--size', type=int, default=20000, help='events every device starts with')
+	parser.add_argument('--seed', type=int, default=0)
+	args = parser.parse_args()
+
+	rng = random.Random(args.seed)
+	with tempfile.TemporaryDirectory() as directory:
+		folder = os.path.join(directory, 'shared')
+		os.mkdir(folder)
+		devices = [Device(os.path.join(directory, str(i)), i) for i in range(args.devices)]
+
+		# The same starting calendar everywhere, as after copying it over once
+		first = devices[0]
+		first.model.add_reminders([Reminder('Event {}'.format(i % 500), rng.randrange(8), [], d, d)
+			for i, d in enumerate(START + timedelta(days=rng.randrange(DAYS)) for i in range(args.size))])
+		first.model.save()
+		for device in devices:
+			device.sync(folder, 0)
+		print('initial change file: {} bytes'.format(os.path.getsize(os.path.join(folder, 'device0-0.changes'))))
+
+		sizes = []
+		for round in range(1, args.rounds + 1):
+			for device in devices:
+				device.edit(rng, args.edits)
+			sizes += [device.sync(folder, round)[0] for device in devices]
+		for device in devices:
+			device.sync(folder, args.rounds + 1)  # picks up what those after it sent in the last round
+
+		expected = state(devices[0].model)
+		agree = all(state(device.model) == expected for device in devices)
+		again = sum(device.model.import_changes(os.path.join(folder, name)) for device in devices for name in os.listdir(folder))
+		fresh = all(state(ReminderModel(device.model.path)) == expected for device in devices)
+		print('{} edits per device between syncs: {:.0f} bytes per change file on average, {} at most'.format(
+			args.edits, sum(sizes) / len(sizes), max(sizes)))
+		print('devices agree: {}, changes applied by importing everything again: {}, agree after reloading: {}'.format(
+			agree, again, fresh))
+	sys.exit(0 if agree and fresh and not again else 1)
+
+
+if __name__ == '__main__':
+	main()
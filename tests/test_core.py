@@ -0,0 +1,298 @@
+# Checks of the UI-free parts of RememberCore and RememberLayout, run with
+#   python3 -m unittest discover tests
+
+import os
+import sys
+import random
+import tempfile
+import unittest
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from RememberCore import format_header, HeaderCache, Reminder, ReminderModel, diff_views, row_keys
+from RememberLayout import layout_frames
+
+
+class HeaderTest (unittest.TestCase):
+	def test_relative_days(self):
+		today = date(2024, 3, 13)
+		self.assertEqual(format_header(today - timedelta(days=2), today), 'Monday, March 11th')
+		self.assertEqual(format_header(today - timedelta(days=1), today), 'Yesterday - Tuesday, March 12th')
+		self.assertEqual(format_header(today, today), 'Today - Wednesday, March 13th')
+		self.assertEqual(format_header(today + timedelta(days=1), today), 'Tomorrow - Thursday, March 14th')
+		self.assertEqual(format_header(today + timedelta(days=2), today), 'Friday, March 15th')
+		
+	def test_week_boundaries(self):
+		sunday, monday = date(2024, 3, 17), date(2024, 3, 18)
+		self.assertEqual(format_header(monday, sunday), 'Tomorrow - Monday, March 18th')
+		self.assertEqual(format_header(sunday, monday), 'Yesterday - Sunday, March 17th')
+		self.assertEqual(format_header(monday + timedelta(days=7), sunday), 'Monday, March 25th')
+		
+	def test_year_boundaries(self):
+		new_years_eve, new_year = date(2024, 12, 31), date(2025, 1, 1)
+		self.assertEqual(format_header(new_year, new_years_eve), 'Tomorrow - Wednesday, January 1st, 2025')
+		self.assertEqual(format_header(new_years_eve, new_year), 'Yesterday - Tuesday, December 31st, 2024')
+		self.assertEqual(format_header(new_year, new_year), 'Today - Wednesday, January 1st')
+		self.assertEqual(format_header(date(2023, 1, 1), new_year), 'Sunday, January 1st, 2023')
+		
+	def test_without_weekday(self):
+		today = date(2024, 12, 31)
+		self.assertEqual(format_header(today, today, False), 'Today - December 31st')
+		self.assertEqual(format_header(today + timedelta(days=1), today, False), 'Tomorrow - January 1st, 2025')
+		self.assertEqual(format_header(today - timedelta(days=3), today, False), 'December 28th')
+		
+	def test_ordinals(self):
+		today = date(2024, 1, 1)
+		days = {1: '1st', 2: '2nd', 3: '3rd', 4: '4th', 11: '11th', 12: '12th', 13: '13th',
+			21: '21st', 22: '22nd', 23: '23rd', 24: '24th', 30: '30th', 31: '31st'}
+		for day, suffix in days.items():
+			self.assertTrue(format_header(date(2024, 5, day), today, False).endswith('May ' + suffix), day)
+			
+	def test_remember(self):
+		self.assertEqual(format_header('Remember', date(2024, 1, 1)), 'Remember')
+		
+	def test_cache_follows_today(self):
+		cache = HeaderCache()
+		d = date(2024, 6, 2)
+		self.assertEqual(cache.get(d, date(2024, 6, 1)), 'Tomorrow - Sunday, June 2nd')
+		self.assertEqual(cache.get(d, date(2024, 6, 2)), 'Today - Sunday, June 2nd')
+		self.assertEqual(cache.get(d, date(2024, 6, 3)), 'Yesterday - Sunday, June 2nd')
+		self.assertEqual(cache.get(d, date(2024, 6, 3), False), 'Yesterday - June 2nd')
+		
+	def test_prepared_titles_follow_today(self):
+		cache = HeaderCache()
+		dates = [date(2024, 12, 30) + timedelta(days=i) for i in range(4)]
+		cache.prepare(dates, date(2024, 12, 31))
+		self.assertEqual(cache.get(dates[2], date(2024, 12, 31)), 'Tomorrow - Wednesday, January 1st, 2025')
+		cache.prepare(dates, date(2025, 1, 1))
+		self.assertEqual(cache.get(dates[2], date(2025, 1, 1)), 'Today - Wednesday, January 1st')
+		self.assertEqual(cache.get(dates[0], date(2025, 1, 1)), 'Monday, December 30th, 2024')
+		
+		
+class ModelTest (unittest.TestCase):
+	def setUp(self):
+		directory = tempfile.TemporaryDirectory()
+		self.addCleanup(directory.cleanup)
+		self.path = os.path.join(directory.name, 'Remember')
+		self.model = ReminderModel(self.path)
+		
+	def add_mondays(self):
+		# Mondays in January 2024, with Jan 8th moved to Feb 15th and Jan 15th to Remember
+		self.model.add_event('Gym', 1, [0], date(2024, 1, 1), date(2024, 1, 31))
+		series = next(iter(self.model.series.values()))
+		self.model.move_event(series, date(2024, 1, 8), date(2024, 2, 15), 0)
+		self.model.move_event(series, date(2024, 1, 15), 'Remember', 0)
+		return series
+		
+	def stored_ids(self, model):
+		return [e.id for l in model.events.values() for e in l]
+		
+	def test_delete_all_removes_moved_occurrences(self):
+		series = self.add_mondays()
+		self.model.remove_repeat_events_in_range(series, series.start_date, series.end_date)
+		self.model.save()
+		for model in (self.model, ReminderModel(self.path)):
+			self.assertEqual((model.series, self.stored_ids(model), model.event_dates), ({}, [], {}))
+			
+	def test_series_edited_into_one_off(self):
+		series = self.add_mondays()
+		self.model.add_event('Gym once', 2, [], date(2024, 1, 1), date(2024, 1, 1), series, date(2024, 1, 1))
+		self.model.save()
+		for model in (self.model, ReminderModel(self.path)):
+			self.assertEqual(model.series, {})
+			self.assertEqual([(d, e.name) for d, l in model.events.items() for e in l], [(date(2024, 1, 1), 'Gym once')])
+			self.assertNotEqual(self.stored_ids(model), [series.id])
+			
+	def test_edit_occurrence_without_series(self):
+		# As left behind by earlier versions when a series was deleted
+		orphans = [Reminder('Gym', 1, [0], date(2024, 1, 1), date(2024, 1, 31)) for i in range(2)]
+		self.model.insert_event(orphans[0], date(2024, 2, 15))
+		self.model.insert_event(orphans[1], date(2024, 2, 16))
+		self.model.add_event('Gym again', 1, [1], date(2024, 2, 20), date(2024, 2, 29), orphans[0], date(2024, 2, 15))
+		self.model.add_event('Gym once', 1, [], date(2024, 2, 16), date(2024, 2, 16), orphans[1], date(2024, 2, 16))
+		self.assertEqual([s.name for s in self.model.series.values()], ['Gym again'])
+		self.assertEqual([(d, e.name) for d, l in self.model.events.items() for e in l], [(date(2024, 2, 16), 'Gym once')])
+		
+	def test_one_off_edited_into_series_keeps_its_date(self):
+		self.model.add_event('Swim', 1, [], date(2024, 5, 1), date(2024, 5, 1))
+		one_off = self.model.events[date(2024, 5, 1)][0]
+		self.model.add_event('Swim', 1, [0], date(2024, 5, 1), date(2024, 5, 31), one_off, date(2024, 5, 1))
+		self.model.save()
+		for model in (self.model, ReminderModel(self.path)):
+			series = next(iter(model.series.values()))
+			self.assertEqual(model.events[date(2024, 5, 1)], [series])
+			self.assertEqual(series.occurrences()[0], date(2024, 5, 6))
+			
+	def test_archive_ended_series_with_moved_occurrence(self):
+		series = self.add_mondays()
+		self.model.archive_before(date(2024, 2, 1))
+		self.assertIs(self.model.series[series.id], series)
+		self.assertEqual(self.model.events[date(2024, 2, 15)], [series])
+		self.model.add_event('Gym later', 1, [0], date(2024, 2, 15), series.end_date, series, date(2024, 2, 15))
+		self.model.save()
+		loaded = ReminderModel(self.path)
+		self.assertEqual([e.name for e in loaded.events[date(2024, 2, 15)]], ['Gym later'])
+		
+		self.model.remove_repeat_events_in_range(series, series.start_date, series.end_date)
+		self.model.restore_archived(date(2024, 1, 1))
+		self.assertEqual((self.model.series, self.stored_ids(self.model)), ({}, []))
+		
+	def test_sync_keeps_archived_start(self):
+		# Archiving one side's past doesn't take it away from the other
+		other = ReminderModel(os.path.join(os.path.dirname(self.path), 'Other'))
+		changes = self.path + '.export'
+		self.model.add_event('Gym', 1, [0], date(2024, 1, 1), date(2024, 12, 31))
+		since = self.model.export_changes(changes)
+		other.import_changes(changes)
+		series = other.series[next(iter(self.model.series))]
+		self.assertEqual(len(series.occurrences()), 53)
+		
+		self.model.archive_before(date(2024, 6, 1))
+		live = next(iter(self.model.series.values()))
+		self.model.add_event('Gym renamed', 1, [0], date(2024, 6, 3), live.end_date, live, date(2024, 6, 3))
+		self.model.export_changes(changes, since)
+		other.import_changes(changes)
+		self.assertEqual((series.name, series.start_date, len(series.occurrences())), ('Gym renamed', date(2024, 1, 1), 53))
+		
+		
+def shown(keys):
+	# What a cell shows for each row key, which copy of a reminder it is under its date aside
+	return [k[:1] + k[2:] for k in keys]
+	
+	
+class StubTable (object):
+	# Applies a ChangeSet the way a table view applies one batch of updates: deletions and the sources of moves are
+	# old index paths, insertions and the destinations of moves are new ones, and the other rows keep their order
+	def __init__(self, view):
+		dates, rows = view
+		self.sections = [shown(rows[d]) for d in dates]
+		
+	def apply(self, changes, new):
+		new_dates, new_rows = new
+		kept = [i for i in range(len(self.sections)) if i not in changes.deleted_sections]
+		moved_from = set(source for source, destination in changes.moved_rows)
+		moved_to = {destination: self.sections[s][r] for (s, r), destination in changes.moved_rows}
+		sections = []
+		for j, d in enumerate(new_dates):
+			if j in changes.inserted_sections:
+				sections.append(shown(new_rows[d]))
+				continue
+			i = kept.pop(0)
+			staying = [k for r, k in enumerate(self.sections[i]) if (i, r) not in changes.deleted_rows and (i, r) not in moved_from]
+			inserted = [r for s, r in changes.inserted_rows if s == j]
+			if len(staying) + len(inserted) + sum(1 for s, r in moved_to if s == j) != len(new_rows[d]):
+				raise AssertionError('section {} has the wrong number of rows after the update'.format(j))
+			staying.reverse()
+			sections.append([moved_to[j, r] if (j, r) in moved_to else shown(new_rows[d])[r] if r in inserted else staying.pop()
+				for r in range(len(new_rows[d]))])
+		self.sections = sections
+		
+		
+def view(days):
+	# (dates, {date: row keys}) as made by ReminderModel.snapshot(), from {date: [reminders]}
+	dates = sorted(days)
+	return dates, {d: row_keys(days[d]) for d in dates}
+	
+	
+class DiffTest (unittest.TestCase):
+	def setUp(self):
+		self.day = date(2024, 5, 1)
+		self.next_day = date(2024, 5, 2)
+		self.a, self.b, self.c, self.d = [Reminder(name, 0, [], self.day, self.day) for name in 'abcd']
+		
+	def check(self, old, new):
+		# The table ends up showing new, and the ChangeSet is returned for checking how it got there
+		old, new = view(old), view(new)
+		changes = diff_views(old, new)
+		table = StubTable(old)
+		table.apply(changes, new)
+		self.assertEqual(table.sections, [shown(new[1][d]) for d in new[0]])
+		return changes
+		
+	def test_unchanged(self):
+		self.assertFalse(self.check({self.day: [self.a, self.b]}, {self.day: [self.a, self.b]}))
+		
+	def test_insert(self):
+		changes = self.check({self.day: [self.a, self.b]}, {self.day: [self.a, self.c, self.b]})
+		self.assertEqual(changes.inserted_rows, [(0, 1)])
+		self.assertEqual((changes.deleted_rows, changes.moved_rows), ([], []))
+		
+	def test_delete(self):
+		changes = self.check({self.day: [self.a, self.b, self.c]}, {self.day: [self.a, self.c]})
+		self.assertEqual(changes.deleted_rows, [(0, 1)])
+		self.assertEqual((changes.inserted_rows, changes.moved_rows), ([], []))
+		
+	def test_sections(self):
+		changes = self.check({self.day: [self.a]}, {self.next_day: [self.a]})
+		self.assertEqual((changes.deleted_sections, changes.inserted_sections), ([0], [0]))
+		changes = self.check({self.day: [self.a]}, {self.day: [self.a], self.next_day: [self.b]})
+		self.assertEqual((changes.deleted_sections, changes.inserted_sections), ([], [1]))
+		
+	def test_move_within_date(self):
+		changes = self.check({self.day: [self.a, self.b, self.c, self.d]}, {self.day: [self.b, self.c, self.d, self.a]})
+		self.assertEqual(changes.moved_rows, [((0, 0), (0, 3))])
+		self.assertEqual((changes.deleted_rows, changes.inserted_rows), ([], []))
+		
+	def test_move_between_dates(self):
+		changes = self.check({self.day: [self.a, self.b], self.next_day: [self.c]}, {self.day: [self.b], self.next_day: [self.a, self.c]})
+		self.assertEqual(changes.moved_rows, [((0, 0), (1, 0))])
+		self.assertEqual((changes.deleted_rows, changes.inserted_rows), ([], []))
+		
+	def test_edited_reminder(self):
+		edited = Reminder('a edited', 0, [], self.day, self.day)
+		edited.id = self.a.id
+		changes = self.check({self.day: [self.a, self.b]}, {self.day: [edited, self.b]})
+		self.assertEqual((changes.deleted_rows, changes.inserted_rows), ([(0, 0)], [(0, 0)]))
+		
+	def test_reminder_twice_on_one_date(self):
+		# Two moved occurrences of one series under the same date
+		series = Reminder('s', 0, [0, 2], self.day, self.day + timedelta(days=30))
+		changes = self.check({self.day: [series, self.a]}, {self.day: [series, self.a, series]})
+		self.assertEqual(changes.inserted_rows, [(0, 2)])
+		changes = self.check({self.day: [series, self.a, series]}, {self.day: [self.a, series]})
+		self.assertEqual((changes.deleted_rows, changes.inserted_rows), ([(0, 2)], []))  # the second copy goes
+		changes = self.check({self.day: [series, self.a, series], self.next_day: [self.b]}, {self.day: [self.a, series], self.next_day: [series, self.b]})
+		self.assertEqual((changes.deleted_rows, changes.inserted_rows), ([], []))  # the second copy moved to the next day
+		
+	def test_random_changes(self):
+		rng = random.Random(0)
+		reminders = [Reminder(str(i), 0, [], self.day, self.day) for i in range(6)]
+		dates = [self.day + timedelta(days=i) for i in range(5)]
+		
+		def days():
+			picked = {d: [rng.choice(reminders) for i in range(rng.randrange(5))] for d in dates}
+			return {d: l for d, l in picked.items() if l}
+		for i in range(2000):
+			self.check(days(), days())
+		
+		
+class LayoutTest (unittest.TestCase):
+	bounds = (0, 0, 375, 667)
+	
+	def moved(self, a, b):
+		# Names of the views whose frames differ between two layouts
+		return set(key[0] for key in a[0] if a[0][key] != b[0][key])
+		
+	def test_same_arguments_are_cached(self):
+		first = layout_frames(self.bounds, 300, False, True)
+		self.assertIs(layout_frames(self.bounds, 300, False, True), first)
+		self.assertIsNot(layout_frames(self.bounds, 300, True, True), first)
+		
+	def test_repeat_end_date_moves_only_the_input_bar(self):
+		hidden = layout_frames(self.bounds, 300, False, True)
+		shown = layout_frames(self.bounds, 300, True, True)
+		self.assertEqual(self.moved(hidden, shown), {'input_view', 'name_input', 'suggestion_view', 'choose_colour_view'})
+		self.assertEqual(shown[0]['input_view', None][3] - hidden[0]['input_view', None][3], 175)
+		self.assertEqual(hidden[1], shown[1])
+		
+	def test_keyboard_moves_only_the_input_view(self):
+		low = layout_frames(self.bounds, 300, True, False)
+		high = layout_frames(self.bounds, 500, True, False)
+		self.assertEqual(self.moved(low, high), {'input_view'})
+		self.assertEqual(high[0]['input_view', None][1] - low[0]['input_view', None][1], 200)
+		self.assertEqual(low[1], high[1])
+		
+		
+if __name__ == '__main__':
+	unittest.main()
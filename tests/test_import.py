@@ -0,0 +1,61 @@
+# Checks of RememberImport, run with
+#   python3 -m unittest discover tests
+
+import io
+import os
+import sys
+import unittest
+from datetime import date
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from RememberImport import read_ics
+
+ALARM_EVENT = '''BEGIN:VCALENDAR
+BEGIN:VEVENT
+SUMMARY:Gym\\, weekly
+DTSTART:20240101
+BEGIN:VALARM
+ACTION:EMAIL
+SUMMARY:Alarm text
+DTSTART:20230101
+RRULE:FREQ=DAILY
+END:VALARM
+RRULE:FREQ=WEEKLY;BYDAY=MO;COUNT=3
+END:VEVENT
+END:VCALENDAR
+'''
+
+BAD_RULES = '''BEGIN:VCALENDAR
+BEGIN:VEVENT
+SUMMARY:No weekdays
+DTSTART:20240101
+RRULE:FREQ=WEEKLY;BYDAY=;COUNT=3
+END:VEVENT
+BEGIN:VEVENT
+SUMMARY:Too many
+DTSTART:20240101
+RRULE:FREQ=DAILY;COUNT=999999999
+END:VEVENT
+BEGIN:VEVENT
+SUMMARY:Fine
+DTSTART:20240103
+END:VEVENT
+END:VCALENDAR
+'''
+
+
+class ICSTest (unittest.TestCase):
+	def test_alarm_properties_are_not_the_event(self):
+		[(line, reminder)] = list(read_ics(io.StringIO(ALARM_EVENT)))
+		self.assertEqual((line, reminder.name, reminder.repeat), (2, 'Gym, weekly', (0,)))
+		self.assertEqual((reminder.start_date, reminder.end_date), (date(2024, 1, 1), date(2024, 1, 15)))
+		
+	def test_bad_rules_are_reported_per_event(self):
+		results = list(read_ics(io.StringIO(BAD_RULES)))
+		self.assertEqual([type(r) for line, r in results[:2]], [ValueError, ValueError])
+		self.assertEqual(results[2][1].name, 'Fine')
+		
+		
+if __name__ == '__main__':
+	unittest.main()